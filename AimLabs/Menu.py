@@ -3,7 +3,6 @@ import os
 import sys
 import pygame
 import math
-from PIL import Image
 
 def resource_path(relative_path):
     """ Obtiene la ruta absoluta de los recursos, compatible con PyInstaller """
@@ -186,6 +185,8 @@ class InstructionsScreen:
 
     def load_gif(self, gif_path):
         """Carga un GIF animado """
+        from PIL import Image  # Pillow solo se necesita aquí, no retrasa el arranque
+
         gif = Image.open(gif_path)
         frames = []
 
@@ -1,13 +1,17 @@
+import argparse
 import os
 import sys
+import multiprocessing
 import pygame
 from pygame.locals import *
 import sys
-from OpenGL.GL import *
-from OpenGL.GLUT import *
-from OpenGL.GLU import *
 from AimLabs.Menu import Menu, InstructionsScreen
-from animacion import Animation
+# OpenGL, NumPy y el motor del juego (animacion) se importan en main() después del menú,
+# para que la intro aparezca sin esperar a las dependencias pesadas.
+
+SIMULATION_HZ = 120  # pasos fijos de simulación por segundo
+RENDER_HZ = 60  # cuadros por segundo (0 = sin límite)
+MAX_FRAME_TIME = 0.25  # tope de tiempo acumulado por cuadro para no encadenar pasos tras un bloqueo
 
 
 def resource_path(relative_path):
@@ -19,6 +23,13 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+def load_instruction_image(index):
+    """Imagen de instrucciones desde el caché de texturas cocinadas (sin decodificar el PNG si ya existe)."""
+    from recursos import INSTRUCTION_IMAGES, cook  # NumPy se importa después de la intro
+
+    return cook(resource_path(INSTRUCTION_IMAGES[index]), mode="RGBA", mipmaps=False).surface()
+
+
 def show_intro(screen, display):
     # Cargar música de introducción
     pygame.mixer.init()
@@ -55,19 +66,49 @@ def show_intro(screen, display):
     pygame.mixer.music.stop()
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PyPrimes 3D")
+    parser.add_argument("--sim-hz", type=int, default=SIMULATION_HZ,
+                        help="pasos de simulación por segundo (default: %(default)s)")
+    parser.add_argument("--render-hz", type=int, default=RENDER_HZ,
+                        help="cuadros por segundo, 0 = sin límite (default: %(default)s)")
+    parser.add_argument("--collisions", action="store_true",
+                        help="activa los choques elásticos entre esferas")
+    parser.add_argument("--shaders", action="store_true",
+                        help="dibuja las esferas con shaders (instanciadas si hay OpenGL 3.3)")
+    parser.add_argument("--renderer", choices=("legacy", "core"), default="legacy",
+                        help="backend de render: función fija u OpenGL 3.3 core con shaders (default: %(default)s)")
+    parser.add_argument("--stats", action="store_true",
+                        help="muestra en el HUD triángulos, cambios de estado y llamadas de dibujo por cuadro")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="semilla del generador aleatorio (partidas reproducibles)")
+    parser.add_argument("--headless", action="store_true",
+                        help="avanza la simulación sin pantalla ni audio y reporta ticks por segundo")
+    parser.add_argument("--ticks", type=int, default=10000,
+                        help="ticks a simular con --headless (default: %(default)s)")
+    parser.add_argument("--spheres", type=int, default=40,
+                        help="esferas por partida con --headless (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def run_headless(args):
+    """Simulación sin GPU ni audio a máxima velocidad (perfilado y pruebas de carga en CI)."""
+    from juego import checksum, run_headless as run
+
+    rate, state = run(args.ticks, args.spheres, collisions=args.collisions, sim_hz=args.sim_hz, seed=args.seed)
+    print(f"{args.ticks} ticks con {args.spheres} esferas: {rate:,.0f} ticks/s (estado {checksum(state)})")
+
+
 def main():
+    args = parse_args()
+    if args.headless:
+        run_headless(args)
+        return
+
     # PASO 1: Inicializar pygame primero
     pygame.init()
 
-    # PASO 2: Inicializar GLUT de forma segura
-    try:
-        glutInit(sys.argv)
-        print("GLUT inicializado correctamente")
-    except Exception as e:
-        print(f"Advertencia: Error al inicializar GLUT: {e}")
-        print("Continuando sin GLUT - usando implementación alternativa")
-
-    # PASO 3: Configurar el display
+    # PASO 2: Configurar el display
     info = pygame.display.Info()
     display = (info.current_w, info.current_h)
     screen = pygame.display.set_mode(display, pygame.FULLSCREEN)
@@ -79,19 +120,19 @@ def main():
     # Configurar las instrucciones (mantener el código original)
     instructions = [
         {
-            "image": pygame.image.load(resource_path("Resource/Instructions/instruccion 1.PNG")),
+            "image": load_instruction_image(0),
             "text": "Usa el mouse para hacer clic en las esferas primas.",
         },
         {
-            "image": pygame.image.load(resource_path("Resource/Instructions/instruccion 2.PNG")),
+            "image": load_instruction_image(1),
             "text": "Evita hacer clic en las esferas no primas.",
         },
         {
-            "image": pygame.image.load(resource_path("Resource/Instructions/instruccion 3.PNG")),
+            "image": load_instruction_image(2),
             "text": "No dejes que se te acabe el tiempo, ¡CUIDADO! En cada nivel las esferas son más pequeñas y veloces.",
         },
         {
-            "image": pygame.image.load(resource_path("Resource/Instructions/instruccion 4.PNG")),
+            "image": load_instruction_image(3),
             "text": "Revienta todas las esferas primas para ganar.",
         },
         {
@@ -138,29 +179,43 @@ def main():
             instructions_screen.draw()
             pygame.display.flip()
 
-    # PASO 4: Cambiar a modo OpenGL DESPUÉS de GLUT
-    pygame.display.set_mode(display, DOUBLEBUF | OPENGL | FULLSCREEN)
-
-    # PASO 5: Configurar OpenGL
-    glMatrixMode(GL_PROJECTION)
-    gluPerspective(45, (display[0] / display[1]), 0.1, 50.0)
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
-    gluLookAt(0, 0, 21, 0, 0, 0, 0, 1, 0)
+    # PASO 3: Cargar OpenGL (el texto usa un atlas de glifos propio, ya no hace falta GLUT)
+    from animacion import Animation
+    from renderizado import request_context
 
-    # PASO 6: Inicializar la animación
-    animation = Animation(display[0], display[1], 40)  # Inicializa con 40 esferas
-    animation.create_spheres(40)  # Genera las 40 esferas iniciales
-
-    # PASO 7: Loop principal del juego
+    # PASO 4-6: Cambiar a modo OpenGL con el contexto que pide el backend e inicializar la animación;
+    # la cámara y la luz las configura el backend. Si el contexto no lo soporta se vuelve a "legacy".
+    renderer = args.renderer
+    while True:
+        try:
+            request_context(renderer)
+            pygame.display.set_mode(display, DOUBLEBUF | OPENGL | FULLSCREEN)
+            animation = Animation(display[0], display[1], 40, collisions=args.collisions,
+                                  use_shaders=args.shaders, seed=args.seed, show_stats=args.stats,
+                                  renderer=renderer)  # Inicializa con 40 esferas
+            break
+        except Exception as e:
+            if renderer == "legacy":
+                raise
+            print(f"Advertencia: backend de render '{renderer}' no disponible ({e}); usando 'legacy'")
+            renderer = "legacy"
+    # Las 40 esferas iniciales ya las crea GameState: volver a crearlas gastaría azar de la semilla y el
+    # nivel 1 dejaría de coincidir con el de --headless
+
+    # PASO 7: Loop principal del juego: simulación a paso fijo, render interpolado a su propia tasa
     clock = pygame.time.Clock()
+    step = 1.0 / args.sim_hz
+    accumulator = 0.0
     while True:
+        accumulator += min(clock.tick(args.render_hz) / 1000.0, MAX_FRAME_TIME)
         animation.handle_events()  # Maneja eventos
-        animation.update_scene()  # Actualiza la lógica del juego
-        animation.render_scene()  # Renderiza la escena actual
+        while accumulator >= step:
+            animation.update_scene(step)  # Actualiza la lógica del juego
+            accumulator -= step
+        animation.render_scene(accumulator / step)  # Renderiza la escena entre los dos últimos pasos
         pygame.display.flip()
-        clock.tick(60)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # necesario para la criba paralela en el ejecutable de PyInstaller
     main()
\ No newline at end of file
@@ -0,0 +1,282 @@
+#benchmark.py
+"""Mediciones de rendimiento de PyPrimes 3D.
+
+Uso: python benchmark.py [nombre ...]   (sin argumentos ejecuta todas)
+El proceso termina con código 1 si alguna comprobación con presupuesto (p. ej. "startup") falla.
+"""
+import os
+import subprocess
+import sys
+import time
+
+# Presupuesto (ms) desde el arranque del intérprete hasta el primer cuadro de show_intro
+STARTUP_BUDGET_MS = float(os.environ.get("PYPRIMES_STARTUP_BUDGET_MS", 600))
+# Mínimo de comprobaciones por segundo (millones, un núcleo) de is_prime_batch con enteros de 64 bits
+IS_PRIME_BATCH_MIN_RATE = float(os.environ.get("PYPRIMES_IS_PRIME_MIN_RATE", 1.0))
+
+# Se ejecuta en un proceso aparte: importa el juego y corta show_intro en su primer pygame.display.flip
+_FIRST_FRAME_SCRIPT = """
+import time
+start = time.perf_counter()
+import pygame
+import PyPrimes3D
+
+class FirstFrame(Exception):
+    pass
+
+def first_flip():
+    raise FirstFrame
+
+pygame.init()
+screen = pygame.display.set_mode((640, 480))
+pygame.display.flip = first_flip
+try:
+    PyPrimes3D.show_intro(screen, (640, 480))
+except FirstFrame:
+    pass
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _timeit(func, *args, repeat=3):
+    """Devuelve el mejor tiempo (en segundos) de varias ejecuciones."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_generate_primes():
+    """Compara la criba segmentada contra el camino anterior con sympy.isprime."""
+    from sympy import isprime
+    from primes import generate_primes, primes_array
+
+    def sympy_generate_primes(n):
+        return [num for num in range(2, n) if isprime(num)]
+
+    print("generate_primes: sympy vs criba segmentada")
+    for n in (10 ** 4, 10 ** 5, 10 ** 6):
+        old = _timeit(sympy_generate_primes, n, repeat=1)
+        new = _timeit(generate_primes, n)
+        print(f"  n={n:>12,}  sympy={old * 1000:9.2f} ms  criba={new * 1000:9.2f} ms  x{old / new:,.0f}")
+
+    for n in (10 ** 8, 10 ** 9):
+        print(f"  primes_array(n={n:,}): {_timeit(primes_array, n, repeat=1):.2f} s")
+    window = 10 ** 10
+    elapsed = _timeit(primes_array, window + 10 ** 7, window, repeat=1)
+    print(f"  primes_array en [10^10, 10^10 + 10^7): {elapsed * 1000:.2f} ms")
+
+
+def bench_headless():
+    """Ticks por segundo de GameState sin pantalla ni audio."""
+    from juego import run_headless
+
+    print("GameState sin render (python PyPrimes3D.py --headless)")
+    for spheres in (40, 1000):
+        rate, _ = run_headless(2000, spheres, seed=0)
+        print(f"  {spheres:>5} esferas: {rate:10,.0f} ticks/s")
+
+
+def bench_is_prime_batch():
+    """Mide is_prime_batch sobre un millón de enteros uint64 aleatorios; falla si 64 bits no llega al mínimo."""
+    import numpy as np
+    from primes import is_prime_batch
+
+    rng = np.random.default_rng(0)
+    print("is_prime_batch: Miller-Rabin vectorizado")
+    for bits in (32, 48, 64):
+        numbers = rng.integers(0, 2 ** bits - 1, 10 ** 6, dtype=np.uint64, endpoint=True)
+        is_prime_batch(numbers[:10])  # construir la caché fuera de la medición
+        elapsed = _timeit(is_prime_batch, numbers, repeat=1)
+        rate = len(numbers) / elapsed / 1e6
+        print(f"  {bits} bits: {rate:.2f} M comprobaciones/s")
+    if rate < IS_PRIME_BATCH_MIN_RATE:
+        print(f"  FALLO: 64 bits por debajo de {IS_PRIME_BATCH_MIN_RATE:.2f} M comprobaciones/s")
+        return False
+    return True
+
+
+def bench_parallel_sieve():
+    """Escalado de la criba paralela con 1, 2, 4 y 8 procesos."""
+    import os
+    from primes import sieve_bitmap
+
+    n = 10 ** 9
+    print(f"sieve_bitmap(0, {n:,}) en paralelo ({os.cpu_count()} núcleos disponibles)")
+    base = None
+    for workers in (1, 2, 4, 8):
+        elapsed = _timeit(sieve_bitmap, 0, n, workers, repeat=1)
+        base = base or elapsed
+        print(f"  {workers} procesos: {elapsed:6.2f} s  x{base / elapsed:.2f}")
+
+
+def bench_prime_pi():
+    """Mide prime_pi y nth_prime hasta 10^12."""
+    from primes import nth_prime, prime_pi
+
+    print("prime_pi / nth_prime")
+    for exponent in (9, 10, 11, 12):
+        x = 10 ** exponent
+        print(f"  prime_pi(10^{exponent}):  {_timeit(prime_pi, x, repeat=1) * 1000:8.1f} ms")
+    for k in (10 ** 9, 37607912018):
+        print(f"  nth_prime({k:,}): {_timeit(nth_prime, k, repeat=1) * 1000:8.1f} ms")
+
+
+def bench_startup():
+    """Tiempo hasta el primer cuadro de la intro (sin pantalla ni audio); falla si supera STARTUP_BUDGET_MS."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYTHONPATH=root)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", _FIRST_FRAME_SCRIPT],
+                            cwd=os.path.join(root, "AimLabs"), env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1])
+        return False
+
+    elapsed = float(result.stdout.strip().splitlines()[-1])
+    print(f"Arranque hasta el primer cuadro de show_intro: {elapsed:.0f} ms (presupuesto {STARTUP_BUDGET_MS:.0f} ms)")
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit() and name.startswith(" ") and not name.startswith("  "):
+                imports.append((int(cumulative) / 1000, name.strip()))  # solo módulos de primer nivel
+    for cumulative, name in sorted(imports, reverse=True)[:5]:
+        print(f"  {name:<20} {cumulative:7.1f} ms")
+
+    if elapsed > STARTUP_BUDGET_MS:
+        print("  FALLO: el arranque supera el presupuesto")
+        return False
+    return True
+
+
+def bench_collisions():
+    """Ticks por segundo de movimiento + choques entre esferas; falla si no sostiene 60 Hz con 5000."""
+    import numpy as np
+    from simulacion import SphereField
+
+    rng = np.random.default_rng(0)
+    bounds = [9, 6, 6]
+    print("SphereField.collide: rejilla espacial + fase fina vectorizada")
+    ok = True
+    for n in (500, 2000, 5000):
+        field = SphereField(n)
+        for k in range(n):
+            field.add(k, 0.12, rng.uniform(-8, 8, 3) * (1, 0.66, 0.66), rng.uniform(-0.05, 0.05, 3),
+                      False, 1.0)
+
+        def tick():
+            field.step(bounds)
+            field.collide(bounds)
+
+        tick()  # construir la rejilla fuera de la medición
+        elapsed = _timeit(lambda: [tick() for _ in range(60)], repeat=1) / 60
+        print(f"  {n:>5} esferas: {elapsed * 1000:6.2f} ms/tick  ({1 / elapsed:,.0f} ticks/s)")
+        ok = ok and (n < 5000 or elapsed < 1 / 60)
+    if not ok:
+        print("  FALLO: 5000 esferas no sostienen 60 Hz")
+    return ok
+
+
+def bench_picking():
+    """Picking de un rayo contra 10 000 esferas; falla si supera 0.2 ms por clic."""
+    import numpy as np
+    from simulacion import SphereField
+
+    rng = np.random.default_rng(0)
+    field = SphereField(10000)
+    for k in range(10000):
+        field.add(k, 0.3, rng.uniform(-8, 8, 3), (0.0, 0.0, 0.0), False, 1.0)
+    camera = np.array([0.0, 0.0, 21.0])
+    targets = rng.uniform(-8, 8, (1000, 3))
+    rays = [(target - camera) / np.linalg.norm(target - camera) for target in targets]
+
+    elapsed = _timeit(lambda: [field.pick(camera, ray) for ray in rays], repeat=3) / len(rays)
+    print(f"SphereField.pick con 10 000 esferas: {elapsed * 1e3:.3f} ms por clic")
+    if elapsed > 0.2e-3:
+        print("  FALLO: el picking supera 0.2 ms")
+        return False
+    return True
+
+
+def bench_render_queue():
+    """Cambios de estado de un cuadro con 500 comandos: en orden de envío contra ordenados por la cola."""
+    import numpy as np
+    from renderizado import DEFAULT_STATE, PASS_STATES, RenderQueue
+
+    rng = np.random.default_rng(0)
+    commands = sorted(((int(rng.integers(len(PASS_STATES))), int(rng.integers(1, 4)), int(rng.integers(8)),
+                        bool(rng.integers(2))) for _ in range(500)), key=lambda command: command[0])
+    queue = RenderQueue((lambda value: None,) * 5)  # Sin OpenGL: solo se cuentan los cambios
+
+    unsorted = 0
+    current = DEFAULT_STATE
+    for render_pass, shader, texture, blend in commands:  # Cada pase en orden, sus comandos sin ordenar
+        state = (*PASS_STATES[render_pass], shader, texture, blend)
+        unsorted += queue.apply(current, state)
+        current = state
+    unsorted += queue.apply(current, DEFAULT_STATE)
+
+    def frame():
+        for render_pass, shader, texture, blend in commands:
+            queue.submit(render_pass, shader, texture, blend, lambda: 1)
+        return queue.flush()
+
+    elapsed = _timeit(frame, repeat=5)
+    print(f"Cola de render: {len(commands)} comandos por cuadro")
+    print(f"  cambios de estado en orden de envío: {unsorted}")
+    print(f"  cambios de estado ordenados:         {queue.state_changes}")
+    print(f"  enviar y ejecutar:                   {elapsed * 1000:.2f} ms por cuadro")
+
+
+def bench_texture_cache():
+    """Decodificar un JPEG de 2048x1024 con pygame contra abrir su versión cocinada (mmap con mipmaps)."""
+    import tempfile
+    import numpy as np
+    import pygame
+    from recursos import cook
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "fondo.jpg")
+        noise = rng.integers(0, 256, (2048, 1024, 3), dtype=np.uint8)  # Ruido: el peor caso para JPEG
+        pygame.image.save(pygame.surfarray.make_surface(noise), path)
+
+        def decode():
+            return pygame.image.tobytes(pygame.image.load(path), "RGB", True)
+
+        def cooked():
+            image = cook(path, mode="RGB", flipped=True, cache_dir=cache_dir)
+            return sum(int(pixels[-1]) for _, _, pixels in image.levels)  # Tocar cada nivel del mmap
+
+        first = _timeit(cook, path, "RGB", True, True, cache_dir, repeat=1)
+        print("Texturas: decodificar JPEG vs caché cocinado")
+        print(f"  decodificar:        {_timeit(decode) * 1000:7.2f} ms")
+        print(f"  cocinar (1ª vez):   {first * 1000:7.2f} ms")
+        print(f"  abrir cocinada:     {_timeit(cooked) * 1000:7.2f} ms")
+
+
+BENCHMARKS = {
+    "collisions": bench_collisions,
+    "generate_primes": bench_generate_primes,
+    "headless": bench_headless,
+    "is_prime_batch": bench_is_prime_batch,
+    "parallel_sieve": bench_parallel_sieve,
+    "picking": bench_picking,
+    "prime_pi": bench_prime_pi,
+    "render_queue": bench_render_queue,
+    "startup": bench_startup,
+    "texture_cache": bench_texture_cache,
+}
+
+
+def main(names):
+    ok = True
+    for name in names or BENCHMARKS:
+        ok = BENCHMARKS[name]() is not False and ok
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
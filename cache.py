@@ -0,0 +1,6 @@
+#cache.py
+"""Raíz común de los cachés en disco del juego, sin dependencias: primes.py guarda ahí el mapa de bits de
+primos y recursos.py las texturas cocinadas. Se cambia con la variable de entorno PYPRIMES_CACHE_DIR."""
+import os
+
+CACHE_ROOT = os.environ.get("PYPRIMES_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "pyprimes3d"))
@@ -0,0 +1,272 @@
+#juego.py
+"""Reglas del juego sin OpenGL ni audio: esferas, puntuación, tiempo, niveles, victoria y derrota."""
+import time
+import numpy as np
+from primes import generate_primes
+from simulacion import BASE_HZ, ParticlePool, Sphere, SphereField
+
+
+class GameState:
+    """Estado completo de una partida.
+
+    Todo el azar sale de self.rng y el tiempo se cuenta en pasos simulados, así que dos partidas con la
+    misma semilla y la misma secuencia de golpes son idénticas bit a bit en cualquier máquina.
+    El render y el audio se enganchan como observadores: objetos con métodos opcionales on_<evento>
+    (on_game_reset, on_next_level, on_prime_hit, on_non_prime_hit, on_victory, on_defeat).
+    sphere_type permite que el render cree sus propias vistas de Sphere con métodos de dibujo.
+    """
+
+    def __init__(self, num_spheres=40, collisions=False, sphere_type=Sphere, observers=(), seed=None,
+                 screen_size=(800, 600)):
+        self.num_spheres = num_spheres
+        self.rng = np.random.default_rng(seed)  # Único generador aleatorio de la partida
+        self.collisions = collisions  # Choques elásticos entre esferas (opcional)
+        self.sphere_type = sphere_type
+        self.observers = list(observers)
+        self.screen_size = screen_size  # Píxeles de la pantalla de victoria, donde cae el confeti
+        #Configuración inicial del estado del juego:
+        self.level = 1
+        self.prime_ratio = 0.5
+        self.current_spheres = 40
+        #Listas y colecciones:
+        self.field = SphereField()  # Datos de las esferas en arreglos contiguos
+        self.spheres = []  # Vistas (Sphere) sobre las esferas vivas del campo
+        self.sphere_by_index = []  # Vista de cada fila del campo (vivas o no), para el picking
+        self.particles = ParticlePool()  # Explosiones y confeti en arreglos preasignados
+        #Manejo de los límites y propiedades del juego:
+        self.bounds = [9, 6, 6] #cubo delimitador
+        self.primes = generate_primes(100)
+        #Variables relacionadas con la puntuación y estado del juego:
+        self.score = 0
+        self.hit_primes = []
+        self.eliminated_spheres = 0
+        #eventos
+        self.paused = False
+        self.lost = False
+        self.defeat = False
+        self.victory = False
+        self.victory_displayed = False
+        #Tiempo y niveles:
+        self.remaining_time = 90
+        self.timer_elapsed = 0.0  # segundos simulados desde el último descuento del temporizador
+        self.time_decrement_per_level = 15
+        self.non_prime_destroyed = 0
+        self.max_non_prime_destroyed = 5
+        self.lose_score = -50
+        self.primes_destroyed = 0
+        self.total_spheres_destroyed = 0
+
+        self.reset_game()
+
+    def notify(self, event, *args):
+        """Avisa a los observadores que implementen on_<event>."""
+        for observer in self.observers:
+            handler = getattr(observer, "on_" + event, None)
+            if handler is not None:
+                handler(*args)
+
+    def reset_game(self):
+        self.score = 0
+        self.hit_primes = []
+        self.eliminated_spheres = 0
+        self.spheres = []
+        self.particles.clear()  # Ni explosiones ni confeti pasan a la nueva partida
+        self.remaining_time = max(90 - (self.level - 1) * 15, 15)  # Reinicia el tiempo según el nivel
+        self.timer_elapsed = 0.0
+        self.create_spheres(self.num_spheres)  # Usa el número actual de esferas
+        self.victory = False
+        self.victory_displayed = False
+        self.lost = False
+        self.defeat = False
+        self.paused = False
+        self.notify("game_reset")
+
+    def update_timer(self, dt=1.0 / BASE_HZ):
+        """Descuenta un segundo del temporizador por cada segundo simulado (no de reloj de pared)."""
+        self.timer_elapsed += dt
+        if self.timer_elapsed >= 1:
+            self.remaining_time -= 1
+            self.timer_elapsed -= 1
+
+        if self.remaining_time <= 0:
+            self.remaining_time = 0
+            self.lost = True
+
+    def create_spheres(self, total_spheres=None):
+        """Crea las esferas según el nivel actual."""
+        if total_spheres is None:
+            total_spheres = self.num_spheres  # Valor predeterminado
+
+        prime_count = int(20 * (0.95 ** (self.level - 1)))  # Primas disminuyen un 5% por nivel
+        non_prime_count = total_spheres - prime_count  # El resto son no primas
+
+        self.field.clear()
+        self.spheres = []
+
+        # Multiplicador de velocidad ajustado
+        speed_multiplier = 0.5 * (1.30 ** min(self.level - 1, 15))
+
+        initial_prime_radius = 0.70
+
+        for i in range(prime_count):
+            position = [
+                self.rng.uniform(-self.bounds[0], self.bounds[0]),
+                self.rng.uniform(-self.bounds[1], self.bounds[1]),
+                self.rng.uniform(-self.bounds[2], self.bounds[2])
+            ]
+            velocity = [
+                self.rng.uniform(-0.05 * speed_multiplier, 0.05 * speed_multiplier),
+                self.rng.uniform(-0.05 * speed_multiplier, 0.05 * speed_multiplier),
+                self.rng.uniform(-0.05 * speed_multiplier, 0.05 * speed_multiplier)
+            ]
+            radius = initial_prime_radius * (0.95 ** (self.level - 1))
+            sphere = self.sphere_type(i + 1, radius, position, velocity, is_prime=True, field=self.field,
+                                      rng=self.rng)
+            sphere.set_color()
+            self.spheres.append(sphere)
+
+        # Crear esferas no primas
+        for i in range(non_prime_count):
+            position = [
+                self.rng.uniform(-self.bounds[0], self.bounds[0]),
+                self.rng.uniform(-self.bounds[1], self.bounds[1]),
+                self.rng.uniform(-self.bounds[2], self.bounds[2])
+            ]
+            velocity = [
+                self.rng.uniform(-0.05 * speed_multiplier, 0.05 * speed_multiplier),
+                self.rng.uniform(-0.05 * speed_multiplier, 0.05 * speed_multiplier),
+                self.rng.uniform(-0.05 * speed_multiplier, 0.05 * speed_multiplier)
+            ]
+            radius = 0.90  # Mantener el tamaño de las esferas no primas constante
+            sphere = self.sphere_type(prime_count + i + 1, radius, position, velocity, is_prime=False,
+                                      field=self.field, rng=self.rng)
+            sphere.set_color()
+            self.spheres.append(sphere)
+
+        self.sphere_by_index = list(self.spheres)
+
+    def update(self, dt=1.0 / BASE_HZ):
+        """Avanza la simulación un paso fijo de dt segundos."""
+        if self.victory or self.lost or self.paused:  # Detener actualizaciones si hay victoria, derrota o pausa
+            self.field.hold()  # Sin avance, la interpolación debe quedarse quieta
+            if self.victory:
+                self.particles.update(dt)  # El confeti sigue cayendo en la pantalla de victoria
+            return
+
+        self.update_timer(dt)
+        self.field.step(self.bounds, dt=dt)  # Un solo paso vectorizado para todas las esferas
+        if self.collisions:
+            self.field.collide(self.bounds)
+        self.particles.update(dt)
+
+        # Verificar si se pierde el juego
+        if self.score <= -40:
+            self.lost = True
+            self.notify("defeat")
+
+        self.check_victory()
+
+    def next_level(self):
+        self.paused = True
+        self.victory = False
+        self.victory_displayed = False
+        self.level += 1
+        self.notify("next_level")
+        for sphere in self.spheres:
+            if self.level <= 15:
+                if sphere.is_prime:
+                    sphere.radius *= 1.1
+                sphere.velocity *= 1.1
+
+        prime_count = int(20 * (0.95 ** (self.level - 1)))
+        non_prime_count = self.num_spheres - prime_count
+        self.create_spheres(prime_count + non_prime_count)
+        self.reset_game()
+        self.remaining_time = max(15, 90 - (self.level - 1) * 15)
+        self.timer_elapsed = 0.0
+
+        print(
+            f"Nivel {self.level} iniciado: {prime_count} esferas primas, {non_prime_count} no primas. Tiempo restante: {self.remaining_time} segundos.")
+
+        self.paused = False
+
+    def check_victory(self):
+        """Verifica si todas las esferas primas fueron eliminadas."""
+        live = self.field.alive[:self.field.count]
+        if not (live & self.field.is_prime[:self.field.count]).any():  # Verifica si no hay más esferas primas
+            self.victory = True
+            self.paused = True
+            self.victory_displayed = True
+            self.spawn_confetti()
+            self.notify("victory")
+            print("¡GANASTE! Esperando entrada para continuar al siguiente nivel.")
+
+    def check_loss(self):
+        """Verifica si se ha perdido la partida."""
+        if self.non_prime_destroyed >= 4:  # Solo la condición de destruir 4 esferas no primas
+            if not self.lost:  # Solo activar la pérdida si no está ya activada
+                self.lost = True
+                self.paused = True  # Pausar el juego al perder
+                self.notify("defeat")
+                print("¡Has perdido! Se destruyeron 4 esferas no primas.")  # Depuración
+
+    def hit(self, sphere):
+        """Elimina la esfera golpeada y aplica la puntuación según sea prima o no."""
+        if sphere.is_prime:
+            self.score += 10
+            self.hit_primes.append(sphere)
+        else:
+            self.score -= 15
+        self.eliminated_spheres += 1
+        self.spheres.remove(sphere)
+        sphere.alive = False
+        self.spawn_explosion(sphere.position, sphere.is_prime)
+        self.notify("prime_hit" if sphere.is_prime else "non_prime_hit", sphere)
+
+    def spawn_explosion(self, position, is_prime):
+        """Crea partículas para la explosión, con colores específicos según el tipo."""
+        color = (0.0, 1.0, 0.0) if is_prime else (1.0, 0.0, 0.0)  # Verde para primas, rojo para no primas
+        velocities = self.rng.uniform(-0.1, 0.1, (15 if is_prime else 7, 3))
+        lifespan = 40 if is_prime else 20  # Más duración para primas
+        self.particles.spawn(position, velocities, color, lifespan)
+
+    def spawn_confetti(self, count=150):
+        """Lanza el confeti de la pantalla de victoria, en píxeles de screen_size.
+
+        Sale de self.rng aquí y no en un observador, para que la partida consuma el mismo azar con o sin
+        pantalla y una semilla reproduzca igual los niveles siguientes. Esa pantalla dibuja las partículas
+        con la proyección en píxeles, así que antes se apagan las explosiones (coordenadas del mundo).
+        """
+        self.particles.clear()
+        width, height = self.screen_size
+        positions = self.rng.uniform(0.0, 1.0, (count, 3)) * (width, height, 0.0)
+        velocities = self.rng.uniform((-1.0, -3.0, 0.0), (1.0, -1.0, 0.0), (count, 3))  # Cae en diagonal
+        colors = self.rng.uniform(0.0, 1.0, (count, 3))  # Color aleatorio por partícula
+        self.particles.spawn(positions, velocities, colors, 240)  # 4 s a 60 pasos por segundo
+
+
+def run_headless(ticks=10000, num_spheres=40, collisions=False, sim_hz=120, seed=None):
+    """Avanza una partida sin pantalla ni audio a máxima velocidad; devuelve (ticks por segundo, estado).
+
+    Cuando la partida termina (victoria o derrota) se reinicia para seguir midiendo.
+    """
+    state = GameState(num_spheres, collisions=collisions, seed=seed)
+    dt = 1.0 / sim_hz
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if state.victory or state.lost:
+            state.reset_game()
+        state.update(dt)
+    return ticks / (time.perf_counter() - start), state
+
+
+def checksum(state):
+    """Huella del estado simulado para comparar corridas con la misma semilla."""
+    import hashlib
+
+    field = state.field
+    digest = hashlib.sha256()
+    for array in (field.positions, field.velocities, field.rotation_angles, field.alive):
+        digest.update(array[:field.count].tobytes())
+    digest.update(repr((state.level, state.score, state.remaining_time)).encode())
+    return digest.hexdigest()[:16]
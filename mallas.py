@@ -0,0 +1,128 @@
+#mallas.py
+"""Geometría precalculada (mallas) sin dependencias de OpenGL."""
+import numpy as np
+
+
+def sphere_mesh(slices=50, stacks=50):
+    """Esfera unitaria como gluSphere: devuelve (vértices float32 (V, 3), índices uint32 (T * 3,)).
+
+    En la esfera unitaria cada vértice es también su normal. Los triángulos van en sentido antihorario
+    vistos desde fuera.
+    """
+    theta = np.linspace(0.0, np.pi, stacks + 1)  # del polo norte (+z) al sur
+    phi = np.linspace(0.0, 2.0 * np.pi, slices + 1)
+    sin_theta = np.sin(theta)[:, None]
+    vertices = np.stack([sin_theta * np.cos(phi),
+                         sin_theta * np.sin(phi),
+                         np.cos(theta)[:, None] * np.ones_like(phi)], axis=-1).reshape(-1, 3)
+
+    row = slices + 1
+    top = (np.arange(stacks)[:, None] * row + np.arange(slices)).ravel()
+    bottom = top + row
+    triangles = np.stack([top, bottom, bottom + 1, top, bottom + 1, top + 1], axis=-1).reshape(-1, 3)
+    # Sin los triángulos degenerados de los polos (el segundo en la primera franja, el primero en la última)
+    stack_of = np.repeat(np.arange(stacks), slices)
+    keep = np.stack([stack_of != stacks - 1, stack_of != 0], axis=-1).reshape(-1)
+    indices = triangles[keep].ravel()
+    return vertices.astype(np.float32), indices.astype(np.uint32)
+
+
+LOD_LEVELS = ((8, 6), (16, 12), (24, 18), (50, 50))  # (slices, stacks) de menor a mayor detalle
+LOD_MIN_RADIUS_PX = (6.0, 20.0, 60.0)  # radio en pantalla desde el que se usa cada nivel después del primero
+LOD_HYSTERESIS = 0.15  # margen relativo alrededor de cada umbral para no alternar niveles (popping)
+
+
+def projected_radii(positions, radii, modelview, projection, viewport_height):
+    """Radio aproximado en píxeles de cada esfera (matrices de OpenGL como arreglos 4x4 por filas)."""
+    depth = -(positions @ modelview[2, :3] + modelview[2, 3])  # distancia a la cámara en el eje de visión
+    focal = projection[1, 1] * viewport_height / 2.0
+    return radii * focal / np.maximum(depth, 1e-3)
+
+
+class LevelOfDetail:
+    """Mallas precalculadas por nivel de detalle y el nivel elegido para cada esfera con histéresis."""
+
+    def __init__(self, levels=LOD_LEVELS, min_radius_px=LOD_MIN_RADIUS_PX, hysteresis=LOD_HYSTERESIS):
+        self.levels = levels
+        self.meshes = [sphere_mesh(slices, stacks) for slices, stacks in levels]
+        self.triangles = np.array([len(indices) // 3 for _, indices in self.meshes])
+        self.thresholds = np.asarray(min_radius_px, dtype=np.float32)
+        self.up = self.thresholds * (1.0 + hysteresis)
+        self.down = self.thresholds * (1.0 - hysteresis)
+        self.current = np.zeros(0, dtype=np.intp)
+        self.version = None
+
+    def select(self, screen_radii, version):
+        """Nivel de cada esfera; solo sube o baja al cruzar el umbral más el margen de histéresis.
+
+        version es SphereField.version: si cambió el conjunto de esferas se eligen niveles desde cero.
+        """
+        if self.version != version or len(self.current) != len(screen_radii):
+            self.current = np.searchsorted(self.thresholds, screen_radii, side="right")
+            self.version = version
+        else:
+            lowest = np.searchsorted(self.up, screen_radii, side="right")
+            highest = np.searchsorted(self.down, screen_radii, side="right")
+            self.current = np.clip(self.current, lowest, highest)
+        return self.current
+
+
+def face_decal(eye, mouth, segments=100):
+    """Carita en el plano z = 0: devuelve (ojos (2, 2), boca (2 * (segments - 1), 2)) en float32.
+
+    eye es la posición (x, y) del ojo derecho (el izquierdo es su reflejo) y mouth los radios (x, y) del
+    arco de la boca entre 0 y π. La boca viene como pares de vértices para GL_LINES, así varias caritas
+    se dibujan juntas en una sola llamada.
+    """
+    angles = np.linspace(0.0, np.pi, segments)
+    arc = np.stack([mouth[0] * np.cos(angles), mouth[1] * np.sin(angles)], axis=-1)
+    eyes = np.array([[-eye[0], eye[1]], [eye[0], eye[1]]])
+    lines = np.stack([arc[:-1], arc[1:]], axis=1).reshape(-1, 2)
+    return eyes.astype(np.float32), lines.astype(np.float32)
+
+
+SMILEY = face_decal((0.09, 0.09), (0.30, -0.30))  # carita de las esferas, en unidades del mundo
+SAD_FACE = face_decal((0.3, 0.5), (0.5, 0.3))  # caritas tristes de la derrota, en unidades de su tamaño
+
+
+def place_decals(points, positions, angles, lift):
+    """Copia los puntos (K, 2) de una calcomanía sobre cada instancia; devuelve (N * K, 3) float32.
+
+    Cada copia se eleva lift[i] en z, se rota angles[i] grados como glRotatef(angle, 1, 1, 0) y se
+    traslada a positions[i], igual que glTranslatef + glRotatef + glTranslatef por esfera.
+    """
+    n = len(positions)
+    local = np.empty((n, len(points), 3))
+    local[:, :, :2] = points
+    local[:, :, 2] = np.asarray(lift, dtype=np.float64)[:, None]
+    theta = np.radians(angles)[:, None, None]
+    c, s = np.cos(theta), np.sin(theta)
+    k = np.sqrt(0.5)  # eje (1, 1, 0) normalizado
+    x, y, z = local[..., 0], local[..., 1], local[..., 2]
+    cross = np.stack([k * z, -k * z, k * (y - x)], axis=-1)
+    along = (k * (x + y))[..., None] * np.array([k, k, 0.0])
+    rotated = local * c + cross * s + along * (1.0 - c)
+    return (rotated + np.asarray(positions)[:, None, :]).reshape(-1, 3).astype(np.float32)
+
+
+def room_quads(bounds):
+    """Caras texturizadas del cubo delimitador: (5, 4, 5) con x, y, z, u, v por vértice.
+
+    El orden de las caras es el de recursos.SKYBOX_IMAGES: fondo, izquierda, derecha, arriba y abajo.
+    """
+    x, y, z = bounds
+    return np.array([
+        [[-x, -y, -z, 0, 0], [x, -y, -z, 1, 0], [x, y, -z, 1, 1], [-x, y, -z, 0, 1]],  # Fondo
+        [[-x, -y, z, 0, 0], [-x, -y, -z, 1, 0], [-x, y, -z, 1, 1], [-x, y, z, 0, 1]],  # Izquierda
+        [[x, -y, -z, 0, 0], [x, -y, z, 1, 0], [x, y, z, 1, 1], [x, y, -z, 0, 1]],  # Derecha
+        [[-x, y, -z, 0, 0], [x, y, -z, 1, 0], [x, y, z, 1, 1], [-x, y, z, 0, 1]],  # Arriba
+        [[-x, -y, z, 0, 0], [x, -y, z, 1, 0], [x, -y, -z, 1, 1], [-x, -y, -z, 0, 1]],  # Abajo
+    ], dtype=np.float32)
+
+
+def box_edges(bounds):
+    """Las 12 aristas del cubo delimitador como pares de vértices para GL_LINES: (24, 3)."""
+    corners = np.array([[-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1],
+                        [-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1]], dtype=np.float32)
+    edges = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7)]
+    return corners[np.array(edges).ravel()] * np.asarray(bounds, dtype=np.float32)
@@ -1,10 +1,1092 @@
-# primes.py
+#primes.py
+import math
+import os
+import struct
+import tempfile
+import time
+import numpy as np
+from cache import CACHE_ROOT
+
+# Tamaño del segmento de trabajo (~256 KiB) para que la criba quepa en la caché L2.
+# Cada byte del segmento representa un número impar; el resultado se guarda empaquetado a 1 bit.
+SEGMENT_BYTES = 1 << 18
+
+# Por encima de este tamaño de rango la criba se reparte entre procesos
+PARALLEL_THRESHOLD = 1 << 28
+PARALLEL_WORKERS = os.cpu_count() or 1
+
+_base_primes_cache = np.array([2, 3, 5, 7], dtype=np.int64)
+_base_primes_limit = 10
+
+
+def _base_primes(limit):
+    """Devuelve los primos <= limit con una criba simple de impares (se reutiliza entre llamadas)."""
+    global _base_primes_cache, _base_primes_limit
+    if limit <= _base_primes_limit:
+        return _base_primes_cache[:np.searchsorted(_base_primes_cache, limit, side="right")]
+
+    requested, limit = limit, max(limit, 2 * _base_primes_limit)  # crecer en forma geométrica
+    size = (limit + 1) // 2  # índice i representa el impar 2i+1
+    is_odd_prime = np.ones(size, dtype=bool)
+    is_odd_prime[0] = False  # el 1 no es primo
+    for i in range(1, (math.isqrt(limit) - 1) // 2 + 1):
+        if is_odd_prime[i]:
+            p = 2 * i + 1
+            is_odd_prime[p * p // 2::p] = False
+    primes = np.concatenate(([2], 2 * np.flatnonzero(is_odd_prime) + 1)).astype(np.int64)
+
+    _base_primes_cache, _base_primes_limit = primes, limit
+    return primes[:np.searchsorted(primes, requested, side="right")]
+
+
+def _sieve_odd_segment(lo, hi, base):
+    """Criba los impares de [lo, hi) con lo par; el índice i representa lo + 2i + 1."""
+    size = (hi - lo) // 2
+    segment = np.ones(size, dtype=bool)
+    if lo == 0 and size:
+        segment[0] = False  # el 1 no es primo
+
+    odd_base = base[1:np.searchsorted(base, math.isqrt(hi - 1), side="right")]
+    if odd_base.size == 0:
+        return segment
+
+    # Primer múltiplo impar de cada primo dentro del segmento (sin tachar al propio primo)
+    first = np.maximum(odd_base * odd_base, ((lo + odd_base) // odd_base) * odd_base)
+    first += odd_base * (first % 2 == 0)
+    offsets = (first - lo - 1) // 2
+
+    for p, start in zip(odd_base.tolist(), offsets.tolist()):
+        if start < size:
+            segment[start::p] = False
+    return segment
+
+
+def _segments(lo, hi, segment_bytes=SEGMENT_BYTES):
+    """Divide [lo, hi) en segmentos alineados a números pares de tamaño L2."""
+    span = 2 * segment_bytes
+    lo -= lo % 2
+    hi += hi % 2
+    for seg_lo in range(lo, hi, span):
+        yield seg_lo, min(seg_lo + span, hi)
+
+
+def _sieve_into_shared(shm_name, size, origin, lo, hi, base_limit):
+    """Tarea de un proceso: criba [lo, hi) y escribe los bits directamente en la memoria compartida."""
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        bits = np.ndarray(size, dtype=np.uint8, buffer=shm.buf)
+        base = _base_primes(base_limit)
+        for seg_lo, seg_hi in _segments(lo, hi):
+            packed = np.packbits(_sieve_odd_segment(seg_lo, seg_hi, base), bitorder="little")
+            offset = (seg_lo - origin) // 16
+            bits[offset:offset + len(packed)] = packed
+        del bits
+    finally:
+        shm.close()
+
+
+def _parallel_sieve_bitmap(lo, hi, workers):
+    """Reparte los segmentos de [lo, hi) entre procesos que escriben en un mapa de bits compartido."""
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    lo -= lo % 2
+    hi += hi % 2
+    span = 2 * SEGMENT_BYTES
+    size = ((hi - lo) // 2 + 7) // 8
+    segment_count = -(-(hi - lo) // span)
+    task_count = min(segment_count, 4 * workers)  # más tareas que procesos para balancear la carga
+    bounds = [lo + (k * segment_count // task_count) * span for k in range(task_count)] + [hi]
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tasks = [pool.submit(_sieve_into_shared, shm.name, size, lo, task_lo, task_hi, math.isqrt(hi))
+                     for task_lo, task_hi in zip(bounds, bounds[1:])]
+            for task in tasks:
+                task.result()
+        return np.ndarray(size, dtype=np.uint8, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def sieve_bitmap(lo, hi, workers=None):
+    """Devuelve el mapa de bits empaquetado de los impares de [lo, hi).
+
+    El bit i (orden little-endian) corresponde al impar lo_par + 2i + 1, donde lo_par es lo
+    redondeado hacia abajo a un número par. Con workers=None el rango se reparte entre
+    PARALLEL_WORKERS procesos cuando supera PARALLEL_THRESHOLD.
+    """
+    if workers is None:
+        workers = PARALLEL_WORKERS if hi - lo >= PARALLEL_THRESHOLD else 1
+    if workers > 1 and hi - lo > 2 * SEGMENT_BYTES:
+        return _parallel_sieve_bitmap(lo, hi, workers)
+
+    base = _base_primes(math.isqrt(max(hi, 0)))
+    chunks = [np.packbits(_sieve_odd_segment(seg_lo, seg_hi, base), bitorder="little")
+              for seg_lo, seg_hi in _segments(lo, hi)]
+    if not chunks:
+        return np.zeros(0, dtype=np.uint8)
+    return np.concatenate(chunks)
+
+
+def iter_primes(start=2, stop=None, chunk=None):
+    """Recorre los primos en [start, stop) bloque a bloque con memoria acotada.
+
+    Con stop=None la secuencia no termina (modo infinito). Si chunk es None produce los primos uno a
+    uno como int; si se indica, produce un arreglo int64 por cada bloque de chunk números cribados.
+    """
+    span = 2 * SEGMENT_BYTES if chunk is None else max(2, chunk + chunk % 2)
+    start = max(start, 2)
+    seg_lo = start - start % 2
+    while stop is None or seg_lo < stop:
+        seg_hi = seg_lo + span if stop is None else min(seg_lo + span, stop + stop % 2)
+        segment = _sieve_odd_segment(seg_lo, seg_hi, _base_primes(math.isqrt(seg_hi)))
+        primes = seg_lo + 2 * np.flatnonzero(segment).astype(np.int64) + 1
+        if seg_lo <= 2 < seg_hi:
+            primes = np.concatenate(([2], primes))
+        primes = primes[(primes >= start) & (primes < (seg_hi if stop is None else stop))]
+        seg_lo = seg_hi
+
+        if chunk is not None:
+            if primes.size:
+                yield primes
+        else:
+            yield from primes.tolist()
+
+
+def primes_array(n, start=2, workers=None):
+    """Devuelve los primos en [start, n) como arreglo int64 usando la criba segmentada.
+
+    Los rangos mayores que PARALLEL_THRESHOLD se criban en paralelo (ver sieve_bitmap).
+    """
+    start = max(start, 2)
+    if workers is None:
+        workers = PARALLEL_WORKERS if n - start >= PARALLEL_THRESHOLD else 1
+    if workers <= 1 or n - start <= 2 * SEGMENT_BYTES:
+        chunks = list(iter_primes(start, n, chunk=2 * SEGMENT_BYTES))
+    else:
+        bits = sieve_bitmap(start, n, workers)
+        origin = start - start % 2
+        chunks = [np.array([2], dtype=np.int64)] if start == 2 else []
+        for offset in range(0, len(bits), SEGMENT_BYTES):
+            flags = np.unpackbits(bits[offset:offset + SEGMENT_BYTES], bitorder="little")
+            odds = origin + 16 * offset + 2 * np.flatnonzero(flags).astype(np.int64) + 1
+            chunks.append(odds[(odds >= start) & (odds < n)])
+    if not chunks:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(chunks)
+
+
+def _icbrt(x):
+    """Raíz cúbica entera (piso) de x."""
+    c = int(round(x ** (1 / 3)))
+    while c ** 3 > x:
+        c -= 1
+    while (c + 1) ** 3 <= x:
+        c += 1
+    return c
+
+
+# prime_pi: Lagarias-Miller-Odlyzko con y = PRIME_PI_ALPHA * x^(1/3) y una criba hasta z = x / y
+PRIME_PI_SIEVE_LIMIT = 1 << 24  # por debajo se cuentan directamente los bits de la criba
+PRIME_PI_ALPHA = 2  # y más grande acorta la criba a cambio de más hojas especiales
+PHI_WHEEL_PRIMES = 7  # φ(u, j) con j < 7 sale de una rueda; la criba de hojas parte de los coprimos con 2·3·...·17
+PHI_SEGMENT = 1 << 22
+PHI_BLOCK_BITS = 6  # conteos de supervivientes por bloques de 64 números y superbloques de 64 bloques
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _prime_counter(limit):
+    """Devuelve una función que calcula pi(u) para arreglos de u <= limit usando el mapa de bits de la criba."""
+    bits = np.append(sieve_bitmap(0, limit + 1), np.uint8(0))
+    before = np.concatenate(([0], np.cumsum(_POPCOUNT[bits], dtype=np.int32)))  # primos impares en bytes previos
+
+    def count(u):
+        u = np.asarray(u, dtype=np.int64)
+        odd = (u + 1) // 2  # impares <= u (el bit i es el impar 2i + 1)
+        byte = odd >> 3
+        partial = _POPCOUNT[bits[byte] & ((1 << (odd & 7)) - 1)]
+        return before[byte] + partial + (u >= 2)
+    return count
+
+
+def _wheel_counts(base, j):
+    """Tabla de la rueda de los j primeros primos: counts[r] = enteros en [1, r] sin factores entre ellos."""
+    period = int(np.prod(base[:j]))
+    coprime = np.ones(period, dtype=bool)
+    for p in base[:j].tolist():
+        coprime[::p] = False
+    return np.cumsum(coprime)
+
+
+def _phi_sieve(u, stage, base, wheel_counts):
+    """φ(u[i], stage[i]) de las hojas difíciles con una criba segmentada de [1, max(u)].
+
+    Cada segmento parte de los coprimos con la rueda y tacha uno a uno los primos siguientes. Tras tachar
+    los stage primeros, las consultas de ese stage suman los supervivientes de los superbloques previos,
+    de los bloques previos del superbloque y de los números previos del bloque.
+    """
+    first = PHI_WHEEL_PRIMES
+    period, fanout = len(wheel_counts), 1 << PHI_BLOCK_BITS
+    coprime = np.diff(wheel_counts, prepend=0).astype(bool)
+    inclusive = np.tri(fanout, dtype=bool)  # fila r: posiciones <= r dentro del bloque
+    exclusive = np.tri(fanout, k=-1, dtype=np.uint8)  # fila r: posiciones < r
+    order = np.argsort(u)
+    u, stage = u[order], stage[order]
+    needed = np.maximum.accumulate(stage[::-1])[::-1]  # último stage con consultas desde cada u en adelante
+    result = np.empty(len(u), dtype=np.int64)
+
+    # Solo hace falta tachar múltiplos p*k con k coprimo con la rueda: los demás ya no sobreviven
+    primes = base[first:int(stage.max())]
+    wheel = np.flatnonzero(coprime)
+    rounds = (int(u[-1]) + PHI_SEGMENT) // (int(base[first]) * period) + 1
+    multipliers = (np.arange(rounds, dtype=np.int64)[:, None] * period + wheel).ravel()
+
+    phi_before = np.zeros(int(stage.max()) + 1, dtype=np.int64)  # supervivientes de cada stage antes del segmento
+    for lo in range(1, int(u[-1]) + 1, PHI_SEGMENT):
+        hi = lo + PHI_SEGMENT
+        begin, end = np.searchsorted(u, (lo, hi))
+        last = int(needed[begin])  # los primos grandes solo tienen hojas con u pequeño
+        by_stage = begin + np.argsort(stage[begin:end], kind="stable")
+        bounds = np.searchsorted(stage[by_stage], np.arange(first, last + 2))
+
+        shift = lo % period
+        alive = np.resize(np.concatenate((coprime[shift:], coprime[:shift])), PHI_SEGMENT)
+        edges = np.arange(lo - 1, hi, fanout)  # conteos iniciales de los bloques con la tabla de la rueda
+        blocks = np.diff(edges // period * wheel_counts[-1] + wheel_counts[edges % period]).astype(np.uint8)
+        supers = blocks.reshape(-1, fanout).sum(axis=1, dtype=np.int32)
+        k_start = np.searchsorted(multipliers, -(-lo // primes[:last - first]))
+        k_stop = np.searchsorted(multipliers, -(-hi // primes[:last - first]))
+        for j in range(first, last + 1):
+            queries = by_stage[bounds[j - first]:bounds[j - first + 1]]
+            if queries.size:
+                offset = u[queries] - lo
+                block = offset >> PHI_BLOCK_BITS
+                group = block >> PHI_BLOCK_BITS
+                numbers = alive.reshape(-1, fanout)[block] & inclusive[offset % fanout]
+                previous = blocks.reshape(-1, fanout)[group] * exclusive[block % fanout]
+                result[queries] = (phi_before[j] + (np.cumsum(supers) - supers)[group]
+                                   + previous.sum(axis=1, dtype=np.int32) + np.count_nonzero(numbers, axis=1))
+            phi_before[j] += supers.sum()
+            if j < last:
+                hits = base[j] * multipliers[k_start[j - first]:k_stop[j - first]] - lo
+                hits = hits[alive[hits]]
+                alive[hits] = False
+                np.subtract.at(blocks, hits >> PHI_BLOCK_BITS, np.uint8(1))
+                np.subtract.at(supers, hits >> (2 * PHI_BLOCK_BITS), np.int32(1))
+
+    unsorted = np.empty_like(result)
+    unsorted[order] = result
+    return unsorted
+
+
+def prime_pi(x):
+    """Cuenta los primos <= x en O(x^(2/3)) con el método combinatorio de Lagarias-Miller-Odlyzko.
+
+    pi(x) = φ(x, a) + a - 1 - P2 con a = pi(y). φ(x, a) se separa en hojas ordinarias (μ(n)·(x // n) con
+    n <= y) y hojas especiales φ(x / (p·m), pi(p) - 1): las de u < p² salen de la tabla de pi hasta z,
+    las de j < PHI_WHEEL_PRIMES de la rueda y el resto de _phi_sieve.
+    """
+    x = int(x)
+    if x < 2:
+        return 0
+    if x < PRIME_PI_SIEVE_LIMIT:
+        return int(_prime_counter(x)(x))
+
+    y = min(int(PRIME_PI_ALPHA * _icbrt(x)), math.isqrt(x))
+    z = x // y
+    base = _base_primes(math.isqrt(x))
+    a = int(np.searchsorted(base, y, side="right"))
+    pi = _prime_counter(z)
+
+    # Función de Möbius e índice (en base) del menor factor primo de cada m <= y
+    mu = np.ones(y + 1, dtype=np.int64)
+    lpf = np.full(y + 1, a, dtype=np.int64)  # m = 1 no tiene factores: admite cualquier p
+    mu[0] = 0
+    for index in range(a - 1, -1, -1):
+        p = int(base[index])
+        mu[p::p] *= -1
+        mu[p * p::p * p] = 0
+        lpf[p::p] = index
+    m = np.arange(y + 1, dtype=np.int64)
+    ordinary = int(np.sum(mu[1:] * (x // m[1:])))
+
+    # Hojas especiales: p = base[j] con y / m < p < menor factor de m, m libre de cuadrados
+    m = np.flatnonzero(mu)
+    lo = np.searchsorted(base, y // m, side="right")
+    per_m = np.maximum(lpf[m] - lo, 0)
+    leaf_m = np.repeat(m, per_m)
+    j = np.arange(len(leaf_m)) - np.repeat(np.cumsum(per_m) - per_m - lo, per_m)
+    p = base[j]
+    u = x // (p * leaf_m)
+    phi = np.empty(len(u), dtype=np.int64)
+
+    wheel = j < PHI_WHEEL_PRIMES
+    rolled = np.flatnonzero(wheel)
+    phi[rolled] = u[rolled]  # φ(u, 0) = u
+    for k in range(1, PHI_WHEEL_PRIMES):
+        sel = rolled[j[rolled] == k]
+        table = _wheel_counts(base, k)
+        phi[sel] = u[sel] // len(table) * table[-1] + table[u[sel] % len(table)]
+    easy = ~wheel & (u < p * p)  # solo sobreviven el 1 y los primos >= p
+    phi[easy] = 1 + np.maximum(pi(u[easy]) - j[easy], 0)
+    hard = ~wheel & ~easy
+    if hard.any():
+        phi[hard] = _phi_sieve(u[hard], j[hard], base, _wheel_counts(base, PHI_WHEEL_PRIMES))
+    special = -int(np.sum(mu[leaf_m] * phi))
+
+    # P2: pares de primos p <= q con y < p <= sqrt(x) y p·q <= x
+    tail = base[a:]
+    p2 = int(np.sum(pi(x // tail))) - int(np.sum(np.arange(a, len(base))))
+    return ordinary + special + a - 1 - p2
+
+
+def _li(x):
+    """Logaritmo integral li(x) para x > 1 con la serie γ + ln ln x + Σ (ln x)^n / (n·n!)."""
+    log_x = math.log(x)
+    total, term, n = 0.5772156649015329 + math.log(log_x), 1.0, 1
+    while True:
+        term *= log_x / n
+        total += term / n
+        if term < 1e-12 * max(abs(total), 1.0):
+            return total
+        n += 1
+
+
+def _riemann_r(x):
+    """Primeros términos de la función R de Riemann: li(x) - li(x^(1/2)) / 2 - li(x^(1/3)) / 3."""
+    return _li(x) - _li(x ** 0.5) / 2 - _li(x ** (1 / 3)) / 3
+
+
+def nth_prime(k):
+    """Devuelve el k-ésimo primo (nth_prime(1) == 2): estimación analítica, prime_pi y criba de corrección."""
+    k = int(k)
+    if k < 1:
+        raise ValueError("k debe ser mayor o igual que 1")
+    if k < 6:
+        return (2, 3, 5, 7, 11)[k - 1]
+
+    # Desarrollo asintótico de Cipolla como punto de partida, refinado con Newton sobre R(x) ≈ pi(x)
+    log_k = math.log(k)
+    log_log_k = math.log(log_k)
+    estimate = k * (log_k + log_log_k - 1 + (log_log_k - 2) / log_k
+                    - (log_log_k ** 2 - 6 * log_log_k + 11) / (2 * log_k ** 2))
+    estimate = max(estimate, 2.0)  # para k pequeño el desarrollo puede dar valores <= 0
+    for _ in range(4):
+        estimate = max(estimate - (_riemann_r(estimate) - k) * math.log(estimate), 2.0)
+    estimate = int(estimate)
+    count = prime_pi(estimate)  # primos <= estimate
+
+    # Criba de corrección por ventanas, dimensionadas según cuántos primos faltan o sobran
+    lo = hi = estimate + 1
+    while True:
+        span = max(1 << 16, int(1.2 * (abs(k - count) + 1) * math.log(estimate)))
+        if count < k:
+            lo, hi = hi, hi + span
+            block = primes_array(hi, lo)
+            if count + len(block) >= k:
+                return int(block[k - count - 1])
+            count += len(block)
+        else:
+            lo, hi = max(2, lo - span), lo
+            block = primes_array(hi, lo)
+            if count - len(block) < k:
+                return int(block[k - (count - len(block)) - 1])
+            count -= len(block)
+
+
+# Caché en disco: cabecera versionada + un bit por número impar (bit i -> 2i + 1)
+CACHE_MAGIC = b"PPRM"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("<4sIQ")  # magic, versión, límite (números < límite)
+CACHE_MIN_LIMIT = 1 << 20
+SIEVE_LOOKUP_LIMIT = 1 << 24  # por debajo se consulta el mapa de bits, por encima Miller-Rabin
+CACHE_PATH = os.path.join(CACHE_ROOT, "primes.bin")
+
+
+class PrimeCache:
+    """Mapa de bits de primos persistente, leído con np.memmap y compartido entre ejecuciones."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.limit = 0
+        self.bits = np.zeros(0, dtype=np.uint8)
+        self._load()
+
+    def _load(self):
+        """Abre el archivo de caché si existe y es válido; si no, deja la caché vacía."""
+        try:
+            with open(self.path, "rb") as f:
+                magic, version, limit = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+            if magic != CACHE_MAGIC or version != CACHE_VERSION or limit < self.limit:
+                return
+            if os.path.getsize(self.path) != CACHE_HEADER.size + limit // 16:
+                return
+            self.bits = np.memmap(self.path, dtype=np.uint8, mode="r",
+                                  offset=CACHE_HEADER.size, shape=(limit // 16,))
+            self.limit = limit
+        except (OSError, ValueError, struct.error):
+            pass
+
+    def ensure(self, n):
+        """Garantiza que la caché cubra todos los números < n, ampliándola si hace falta."""
+        if n <= self.limit:
+            return
+        self._load()  # otra instancia del juego pudo haberla ampliado
+        if n <= self.limit:
+            return
+
+        new_limit = max(n, 2 * self.limit, CACHE_MIN_LIMIT)
+        new_limit += -new_limit % 16  # límite múltiplo de 16 para que el cuerpo sea de bytes completos
+        bits = np.concatenate((self.bits, sieve_bitmap(self.limit, new_limit)))
+        self.bits, self.limit = bits, new_limit
+        self._save()
+
+    def _save(self):
+        """Escribe la caché de forma atómica (archivo temporal + os.replace) y la vuelve a mapear."""
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, self.limit))
+                    f.write(self.bits.tobytes())
+                os.replace(tmp_path, self.path)
+            except OSError:
+                os.remove(tmp_path)
+                raise
+        except OSError as e:
+            # Sin permisos o archivo bloqueado por otra instancia: se sigue con la copia en memoria
+            print(f"Advertencia: no se pudo guardar la caché de primos: {e}")
+            return
+        self._load()
+
+    def is_prime(self, x):
+        """Consulta O(1) de primalidad en el mapa de bits."""
+        if x < 3:
+            return x == 2
+        if x % 2 == 0:
+            return False
+        self.ensure(x + 1)
+        i = x // 2
+        return bool((self.bits[i >> 3] >> (i & 7)) & 1)
+
+    def primes_below(self, n):
+        """Devuelve los primos menores que n como arreglo int64 sin volver a cribar."""
+        if n <= 2:
+            return np.zeros(0, dtype=np.int64)
+        self.ensure(n)
+        odd_count = n // 2  # impares 1, 3, ..., menores que n
+        flags = np.unpackbits(self.bits[:(odd_count + 7) // 8], count=odd_count, bitorder="little")
+        return np.concatenate(([2], 2 * np.flatnonzero(flags).astype(np.int64) + 1))
+
+
+_cache = None
+
+
+def _get_cache():
+    global _cache
+    if _cache is None:
+        _cache = PrimeCache()
+    return _cache
+
+
+def is_prime(x):
+    """Devuelve True si x es primo: caché persistente para valores pequeños, Miller-Rabin para el resto."""
+    x = int(x)
+    if x < SIEVE_LOOKUP_LIMIT:
+        return _get_cache().is_prime(x)
+    return _is_probable_prime(x)
 
-from sympy import isprime, primefactors
 
 def generate_primes(n):
-    primes = [num for num in range(2, n) if isprime(num)]
-    return primes
+    """Devuelve la lista de primos menores que n."""
+    return _get_cache().primes_below(n).tolist()
+
+
+# Tabla de menor factor primo (SPF); por encima de SPF_MAX_LIMIT se usa sympy
+SPF_MIN_LIMIT = 1 << 16
+SPF_MAX_LIMIT = 1 << 24
+
+_spf = np.zeros(0, dtype=np.uint32)
+
+
+def smallest_prime_factors(limit):
+    """Devuelve la tabla spf[i] = menor factor primo de i para i < limit (spf[0] = spf[1] = 0).
+
+    Criba lineal vectorizada: cada compuesto c = p * i con p = spf(c) <= spf(i) se escribe una sola vez.
+    """
+    global _spf
+    limit = max(limit, SPF_MIN_LIMIT)
+    if limit <= len(_spf):
+        return _spf
+
+    limit = max(limit, 2 * len(_spf))
+    spf = np.zeros(limit, dtype=np.uint32)
+    for p in _base_primes(math.isqrt(limit - 1)).tolist():
+        cofactors = np.arange(p, (limit - 1) // p + 1)
+        cofactor_spf = spf[cofactors]
+        # Los cofactores aún en cero son primos (su spf es ellos mismos, >= p)
+        keep = (cofactor_spf == 0) | (cofactor_spf >= p)
+        spf[cofactors[keep] * p] = p
+    primes = np.flatnonzero(spf == 0)
+    spf[primes] = primes
+    spf[:2] = 0
+
+    _spf = spf
+    return spf
+
+
+def factorize_many(numbers):
+    """Factores primos distintos de cada número del arreglo, en formato CSR.
+
+    Devuelve (offsets, factors): los factores del elemento i son factors[offsets[i]:offsets[i + 1]],
+    en orden ascendente. Los números menores que 2 no tienen factores.
+    """
+    numbers = np.abs(np.asarray(numbers, dtype=np.int64)).ravel()
+    large = numbers >= SPF_MAX_LIMIT
+    small_values = np.where(large, 0, numbers)
+    spf = smallest_prime_factors(int(small_values.max(initial=0)) + 1)
+
+    rows, factors = [], []
+    current = small_values.copy()
+    last = np.zeros_like(current)
+    active = np.flatnonzero(current > 1)
+    while active.size:
+        p = spf[current[active]].astype(np.int64)
+        new = p != last[active]
+        rows.append(active[new])
+        factors.append(p[new])
+        last[active] = p
+        current[active] //= p
+        active = active[current[active] > 1]
+
+    for i in np.flatnonzero(large).tolist():
+        big_factors = factorize_number(int(numbers[i]))
+        rows.append(np.full(len(big_factors), i, dtype=np.int64))
+        factors.append(np.array(big_factors, dtype=np.int64))
+
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    factors = np.concatenate(factors) if factors else np.zeros(0, dtype=np.int64)
+    order = np.argsort(rows, kind="stable")  # por fila, conservando el orden ascendente de cada una
+    offsets = np.zeros(len(numbers) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(numbers)), out=offsets[1:])
+    return offsets, factors[order]
+
+
+# Motor de factorización con latencia acotada para números grandes
+TRIAL_DIVISION_LIMIT = 1 << 16
+RHO_MAX_ITERATIONS = 1 << 16
+ECM_B1 = 2000
+ECM_MAX_CURVES = 40
+_MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+class _Budget:
+    """Presupuesto de tiempo y/o iteraciones compartido por las etapas de factorización."""
+
+    def __init__(self, time_budget=None, max_iterations=None):
+        self.deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.iterations_left = max_iterations
+
+    def spend(self, iterations=1):
+        """Descuenta iteraciones; devuelve False cuando el presupuesto se agotó."""
+        if self.iterations_left is not None:
+            self.iterations_left -= iterations
+            if self.iterations_left < 0:
+                return False
+        return self.deadline is None or time.perf_counter() <= self.deadline
+
+
+def _is_probable_prime(n):
+    """Miller-Rabin con los 13 primeros primos como bases: determinista para n < 3.3e24."""
+    if n < 2:
+        return False
+    for p in _MR_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _MR_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _trial_divide(n, found):
+    """Divide n entre los primos pequeños en caché, agrega los que lo dividen y devuelve el cofactor."""
+    small = _base_primes(TRIAL_DIVISION_LIMIT)
+    if n < 1 << 63:
+        divisors = small[np.int64(n) % small == 0].tolist()
+    else:
+        divisors = [p for p in small.tolist() if n % p == 0]
+    for p in divisors:
+        found.add(p)
+        while n % p == 0:
+            n //= p
+    return n
+
+
+def _pollard_brent(n, c, budget):
+    """Rho de Pollard con la variante de Brent (productos de gcd por bloques); None si no encuentra factor."""
+    block = 128
+    y, r, q, g = 2, 1, 1, 1
+    x = ys = y
+    steps_done = 0
+    while g == 1:
+        x = y
+        for _ in range(r):
+            y = (y * y + c) % n
+        steps_done += r
+        k = 0
+        while k < r and g == 1:
+            ys = y
+            steps = min(block, r - k)
+            for _ in range(steps):
+                y = (y * y + c) % n
+                q = q * abs(x - y) % n
+            g = math.gcd(q, n)
+            k += steps
+            steps_done += steps
+            if g == 1 and (steps_done > RHO_MAX_ITERATIONS or not budget.spend(steps)):
+                return None
+        r *= 2
+
+    if g == n:
+        # El producto del bloque absorbió todos los factores: retroceder paso a paso
+        g = 1
+        while g == 1:
+            ys = (ys * ys + c) % n
+            g = math.gcd(abs(x - ys), n)
+    return g if g != n else None
+
+
+def _xdbl(x, z, a24, n):
+    """Duplica un punto (X:Z) de una curva de Montgomery."""
+    t1 = (x + z) * (x + z) % n
+    t2 = (x - z) * (x - z) % n
+    t = t1 - t2
+    return t1 * t2 % n, t * (t2 + a24 * t) % n
+
+
+def _xadd(xp, zp, xq, zq, xd, zd, n):
+    """Suma diferencial P + Q conociendo P - Q = (xd:zd)."""
+    u = (xp - zp) * (xq + zq)
+    v = (xp + zp) * (xq - zq)
+    return zd * (u + v) * (u + v) % n, xd * (u - v) * (u - v) % n
+
+
+def _montgomery_ladder(k, x, z, a24, n):
+    """Calcula k * (x:z) con la escalera de Montgomery."""
+    x0, z0 = x, z
+    x1, z1 = _xdbl(x, z, a24, n)
+    for bit in bin(k)[3:]:
+        if bit == "1":
+            x0, z0 = _xadd(x1, z1, x0, z0, x, z, n)
+            x1, z1 = _xdbl(x1, z1, a24, n)
+        else:
+            x1, z1 = _xadd(x0, z0, x1, z1, x, z, n)
+            x0, z0 = _xdbl(x0, z0, a24, n)
+    return x0, z0
+
+
+def _ecm(n, budget):
+    """Etapa 1 de ECM (curvas de Montgomery con parametrización de Suyama); None si no encuentra factor."""
+    multipliers = []
+    for p in _base_primes(ECM_B1).tolist():
+        q = p
+        while q * p <= ECM_B1:
+            q *= p
+        multipliers.append(q)
+
+    for sigma in range(6, 6 + ECM_MAX_CURVES):
+        u = (sigma * sigma - 5) % n
+        v = 4 * sigma % n
+        x, z = pow(u, 3, n), pow(v, 3, n)
+        denominator = 16 * x * v % n
+        g = math.gcd(denominator, n)
+        if g != 1:
+            if g != n:
+                return g
+            continue
+        a24 = pow(v - u, 3, n) * (3 * u + v) * pow(denominator, -1, n) % n
+        for q in multipliers:
+            x, z = _montgomery_ladder(q, x, z, a24, n)
+            if not budget.spend(q.bit_length()):
+                return None
+        g = math.gcd(z, n)
+        if 1 < g < n:
+            return g
+    return None
+
+
+def _split(n, budget):
+    """Busca un divisor no trivial del compuesto n: cuadrado perfecto, rho de Pollard-Brent y ECM."""
+    root = math.isqrt(n)
+    if root * root == n:
+        return root
+    for c in (1, 3, 5):
+        d = _pollard_brent(n, c, budget)
+        if d is not None:
+            return d
+        if not budget.spend(0):
+            return None
+    return _ecm(n, budget)
+
+
+def factorize_bounded(num, time_budget=None, max_iterations=None):
+    """Factoriza num con latencia acotada: división por primos pequeños, rho de Pollard-Brent y ECM.
+
+    time_budget (segundos) y max_iterations limitan el trabajo. Devuelve (factors, remainder): los
+    factores primos distintos encontrados en orden ascendente y el cofactor que quedó sin factorizar
+    (1 si la factorización está completa).
+    """
+    n = abs(int(num))
+    if n < SPF_MAX_LIMIT:
+        return factorize_number(n), 1
+
+    budget = _Budget(time_budget, max_iterations)
+    found = set()
+    n = _trial_divide(n, found)
+    pending = [n] if n > 1 else []
+    remainder = 1
+    while pending:
+        m = pending.pop()
+        if m < TRIAL_DIVISION_LIMIT ** 2 or _is_probable_prime(m):
+            found.add(m)  # sin divisores pequeños y menor que el límite al cuadrado: es primo
+            continue
+        d = _split(m, budget)
+        if d is None:
+            remainder *= m
+        else:
+            pending += [d, m // d]
+    return sorted(found), remainder
+
 
 def factorize_number(num):
-    return primefactors(num)
+    """Devuelve los factores primos distintos de num en orden ascendente."""
+    num = abs(int(num))
+    if num >= SPF_MAX_LIMIT:
+        factors, remainder = factorize_bounded(num)
+        if remainder > 1:
+            # Ninguna etapa separó el cofactor: sympy (dependencia opcional) como último recurso
+            from sympy import primefactors
+            factors = sorted(set(factors) | set(primefactors(remainder)))
+        return factors
+
+    spf = smallest_prime_factors(num + 1)
+    factors = []
+    while num > 1:
+        p = int(spf[num])
+        factors.append(p)
+        while num % p == 0:
+            num //= p
+    return factors
+
+
+# Miller-Rabin vectorizado para lotes uint64 (aritmética de Montgomery con productos de 128 bits emulados)
+MR_BASES_32 = (2, 7, 61)  # deterministas para n < 2^32
+MR_BASES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)  # deterministas para n < 2^64
+MR_TRIAL_LIMIT = 256  # primos de la división previa que descarta la mayoría de compuestos
+_U32 = np.uint64(32)
+_LOW32 = np.uint64(0xFFFFFFFF)
+_ZERO = np.uint64(0)
+_ONE = np.uint64(1)
+
+
+class _MontgomeryBatch:
+    """Aritmética modular vectorizada mod n (arreglo de impares uint64) en forma de Montgomery, R = 2^64.
+
+    Los productos de 64x64 bits se arman con mitades de 32 bits, así que nada se desborda. Todas las
+    operaciones trabajan in situ sobre buffers temporales preasignados del tamaño del lote: con lotes de
+    cientos de miles de elementos, crear un arreglo nuevo por operación costaba más que la aritmética.
+    """
+
+    _CONSTANTS = ("n", "n_low", "n_high", "n_neg_inv", "one", "minus_one", "r2")
+
+    def __init__(self, n):
+        self.n = n
+        self.n_low, self.n_high = n & _LOW32, n >> _U32
+        inv = n.copy()  # n * n = 1 mod 8; cada paso de Newton duplica los bits correctos
+        for _ in range(5):
+            inv *= np.uint64(2) - n * inv
+        self.n_neg_inv = _ZERO - inv
+        self.one = (_ZERO - n) % n  # R mod n: el 1 en forma de Montgomery
+        self.minus_one = n - self.one
+        self.r2 = None  # R^2 mod n, se calcula con el primer to_montgomery
+        self._allocate()
+
+    def _allocate(self):
+        self._words = [np.empty_like(self.n) for _ in range(8)]
+        self._flags = [np.empty(self.n.shape, dtype=bool) for _ in range(2)]
+
+    def subset(self, index):
+        """Devuelve el contexto restringido a los elementos index."""
+        batch = _MontgomeryBatch.__new__(_MontgomeryBatch)
+        for name in self._CONSTANTS:
+            value = getattr(self, name)
+            setattr(batch, name, None if value is None else value[index])
+        batch._allocate()
+        return batch
+
+    def _reduce(self, high, low):
+        """REDC in situ sobre high: (high * 2^64 + low) * 2^-64 mod n, con high < n. low se pierde."""
+        m_high, q00, q01, half = self._words[:4]  # mul y sqr dejan low en _words[4]
+        carry, overflow = self._flags
+        np.not_equal(low, _ZERO, out=carry)  # low + low(m * n) es múltiplo de 2^64: solo aporta acarreo
+        low *= self.n_neg_inv  # m
+        np.right_shift(low, _U32, out=m_high)
+        low &= _LOW32  # m_low
+        np.multiply(low, self.n_low, out=q00)
+        np.multiply(low, self.n_high, out=q01)
+        np.multiply(m_high, self.n_low, out=low)  # q10
+        m_high *= self.n_high
+        q00 >>= _U32
+        np.bitwise_and(q01, _LOW32, out=half)
+        q00 += half
+        np.bitwise_and(low, _LOW32, out=half)
+        q00 += half
+        q00 >>= _U32
+        q01 >>= _U32
+        low >>= _U32
+        m_high += q01
+        m_high += low
+        m_high += q00
+        np.add(m_high, carry, out=m_high, casting="unsafe")  # m_high <= n - 1: el acarreo no desborda
+
+        high += m_high
+        np.less(high, m_high, out=overflow)
+        np.greater_equal(high, self.n, out=carry)
+        overflow |= carry
+        np.subtract(high, self.n, out=high, where=overflow)
+        return high
+
+    def mul(self, a, b, out=None):
+        """a * b en forma de Montgomery; out puede ser a o b."""
+        out = np.empty_like(a) if out is None else out
+        a0, a1, b0, b1, low, p01, a1b0, _ = self._words
+        np.bitwise_and(a, _LOW32, out=a0)
+        np.right_shift(a, _U32, out=a1)
+        np.bitwise_and(b, _LOW32, out=b0)
+        np.right_shift(b, _U32, out=b1)
+        np.multiply(a0, b0, out=low)
+        np.multiply(a0, b1, out=p01)
+        np.multiply(a1, b0, out=a1b0)
+        np.multiply(a1, b1, out=out)  # parte alta
+        mid = a0
+        np.right_shift(low, _U32, out=mid)
+        np.bitwise_and(p01, _LOW32, out=b0)
+        mid += b0
+        np.bitwise_and(a1b0, _LOW32, out=b0)
+        mid += b0
+        p01 >>= _U32
+        a1b0 >>= _U32
+        out += p01
+        out += a1b0
+        np.right_shift(mid, _U32, out=b0)
+        out += b0
+        low &= _LOW32
+        mid <<= _U32
+        low |= mid
+        return self._reduce(out, low)
+
+    def sqr(self, a, out=None):
+        """a * a en forma de Montgomery (un producto cruzado menos que mul); out puede ser a."""
+        out = np.empty_like(a) if out is None else out
+        a0, a1, cross, half, low = self._words[:5]
+        np.bitwise_and(a, _LOW32, out=a0)
+        np.right_shift(a, _U32, out=a1)
+        np.multiply(a0, a0, out=low)
+        np.multiply(a0, a1, out=cross)
+        np.multiply(a1, a1, out=out)  # parte alta
+        mid = a0
+        np.right_shift(low, _U32, out=mid)
+        np.bitwise_and(cross, _LOW32, out=half)
+        half <<= _ONE
+        mid += half
+        cross >>= _U32
+        cross <<= _ONE
+        out += cross
+        np.right_shift(mid, _U32, out=half)
+        out += half
+        low &= _LOW32
+        mid <<= _U32
+        low |= mid
+        return self._reduce(out, low)
+
+    def double(self, a, where=None):
+        """2a mod n in situ sobre a; con where (uint64 0 o 1 por elemento) solo donde vale 1."""
+        addend, wrap, high = self._words[0], self._flags[0], self._flags[1]
+        if where is None:
+            np.copyto(addend, a)
+        else:
+            np.multiply(a, where, out=addend)
+        a += addend
+        np.less(a, addend, out=wrap)
+        np.greater_equal(a, self.n, out=high)
+        wrap |= high
+        np.subtract(a, self.n, out=a, where=wrap)
+        return a
+
+    def to_montgomery(self, a):
+        """a * R mod n para un arreglo a < n: un producto de Montgomery por R^2 mod n."""
+        if self.r2 is None:
+            self.r2 = self.one.copy()
+            for _ in range(64):  # R * 2^64 mod n por duplicaciones modulares
+                self.double(self.r2)
+        return self.mul(a, self.r2)
+
+
+def _strong_probable_prime(ctx, x, d_twos):
+    """Completa la ronda de Miller-Rabin a partir de x = a^d; d_twos es la potencia de 2 de n - 1."""
+    passed = (x == ctx.one) | (x == ctx.minus_one)
+    pending = np.flatnonzero(~passed & (d_twos > 1))
+    for r in range(1, int(d_twos.max(initial=0))):
+        pending = pending[d_twos[pending] > r]
+        if pending.size == 0:
+            break
+        sub = ctx.subset(pending)
+        x_pending = sub.sqr(x[pending])
+        x[pending] = x_pending
+        hit = x_pending == sub.minus_one
+        passed[pending[hit]] = True
+        pending = pending[~hit]
+    return passed
+
+
+def _miller_rabin_uint32(n):
+    """Miller-Rabin determinista para impares n < 2^32: los productos caben en uint64, basta con %."""
+    n_minus_1 = n - _ONE
+    d_twos = np.log2((n_minus_1 & (_ZERO - n_minus_1)).astype(np.float64)).astype(np.int64)
+    d = n_minus_1 >> d_twos.astype(np.uint64)
+    candidates = np.arange(len(n))
+    for base in MR_BASES_32:
+        if candidates.size == 0:
+            break
+        nc, dc, twos = n[candidates], d[candidates], d_twos[candidates]
+        a = np.uint64(base) % nc
+        x = np.ones_like(nc)
+        for bit in range(int(dc.max()).bit_length()):
+            x = np.where((dc >> np.uint64(bit)) & _ONE == _ONE, x * a % nc, x)
+            a = a * a % nc
+        passed = (a == 0) | (x == 1) | (x == nc - _ONE)
+        for r in range(1, int(twos.max())):
+            x = x * x % nc
+            passed |= (x == nc - _ONE) & (twos > r)
+        candidates = candidates[passed]
+
+    result = np.zeros(len(n), dtype=bool)
+    result[candidates] = True
+    return result
+
+
+def _miller_rabin_uint64(n):
+    """Prueba de Miller-Rabin determinista sobre un arreglo de impares uint64 sin factores pequeños."""
+    n_minus_1 = n - _ONE
+    d_twos = np.log2((n_minus_1 & (_ZERO - n_minus_1)).astype(np.float64)).astype(np.int64)
+    d = n_minus_1 >> d_twos.astype(np.uint64)
+    ctx = _MontgomeryBatch(n)
+    top_bit = int(d.max(initial=0)).bit_length() - 1
+
+    # Base 2: multiplicar por 2 es una duplicación modular, no hace falta un producto completo
+    x = ctx.one.copy()
+    selected = np.empty_like(n)
+    for bit in range(top_bit, -1, -1):
+        ctx.sqr(x, out=x)
+        np.right_shift(d, np.uint64(bit), out=selected)
+        selected &= _ONE
+        ctx.double(x, where=selected)
+    candidates = np.flatnonzero(_strong_probable_prime(ctx, x, d_twos))
+
+    # Resto de bases sobre los sobrevivientes (casi todos primos), con ventana fija de 4 bits
+    sub = ctx.subset(candidates)
+    for base in MR_BASES_64[1:]:
+        if candidates.size == 0:
+            break
+        dc = d[candidates]
+        a = np.uint64(base) % sub.n
+        skip = a == 0  # la base es múltiplo de n: no aporta información
+        table = np.empty((16, len(candidates)), dtype=np.uint64)
+        table[0] = sub.one
+        table[1] = sub.to_montgomery(a)
+        for k in range(2, 16):
+            sub.mul(table[k - 1], table[1], out=table[k])
+        columns = np.arange(len(candidates))
+
+        x = sub.one.copy()
+        for shift in range(top_bit - top_bit % 4, -1, -4):
+            if shift != top_bit - top_bit % 4:
+                for _ in range(4):
+                    sub.sqr(x, out=x)
+            window = ((dc >> np.uint64(shift)) & np.uint64(15)).astype(np.intp)
+            sub.mul(x, table[window, columns], out=x)
+        passed = skip | _strong_probable_prime(sub, x, d_twos[candidates])
+        if not passed.all():
+            sub = sub.subset(np.flatnonzero(passed))
+        candidates = candidates[passed]
+
+    result = np.zeros(len(n), dtype=bool)
+    result[candidates] = True
+    return result
+
+
+def _trial_groups():
+    """Primos impares menores que MR_TRIAL_LIMIT agrupados como (producto < 2^32, [primos])."""
+    groups, product, group = [], 1, []
+    for p in _base_primes(MR_TRIAL_LIMIT)[1:].tolist():
+        if product * p >= 1 << 32:
+            groups.append((product, group))
+            product, group = 1, []
+        product *= p
+        group.append(p)
+    groups.append((product, group))
+    return groups
+
+
+def is_prime_batch(numbers):
+    """Primalidad de un arreglo de enteros sin signo de 64 bits; devuelve un arreglo bool de la misma forma.
+
+    Los valores pequeños se consultan en el mapa de bits de la caché y el resto pasa por división entre
+    primos pequeños y Miller-Rabin determinista vectorizado.
+    """
+    numbers = np.asarray(numbers, dtype=np.uint64)
+    flat = numbers.ravel()
+    result = np.zeros(flat.shape, dtype=bool)
+
+    cache = _get_cache()
+    cache.ensure(SIEVE_LOOKUP_LIMIT)
+    limit = np.uint64(cache.limit)
+    small = np.flatnonzero(flat < limit)
+    values = flat[small]
+    half = values >> _ONE
+    bits = (cache.bits[half >> np.uint64(3)] >> (half & np.uint64(7)).astype(np.uint8)) & 1
+    result[small] = ((values & _ONE == _ONE) & (bits == 1)) | (values == 2)
+
+    large = np.flatnonzero((flat >= limit) & (flat & _ONE == _ONE))
+    values = flat[large]
+    # División previa por grupos de primos cuyo producto cabe en 32 bits: un solo % de 64 bits por grupo
+    # y el resto de cada primo sobre el residuo uint32, mucho más barato
+    for product, group in _trial_groups():
+        residue = (values % np.uint64(product)).astype(np.uint32)
+        keep = residue % np.uint32(group[0]) != 0
+        for p in group[1:]:
+            keep &= residue % np.uint32(p) != 0
+        large, values = large[keep], values[keep]
+    word = values < np.uint64(1 << 32)
+    result[large[word]] = _miller_rabin_uint32(values[word])
+    result[large[~word]] = _miller_rabin_uint64(values[~word])
+    return result.reshape(numbers.shape)
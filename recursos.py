@@ -0,0 +1,203 @@
+#recursos.py
+"""Caché de texturas "cocinadas": píxeles ya decodificados (con sus mipmaps) en archivos binarios crudos.
+
+La primera vez que se pide una imagen se decodifica con pygame y se guarda en CACHE_DIR con el nombre
+del hash de su contenido; las siguientes veces el archivo se abre con np.memmap y sus niveles se pasan
+tal cual a glTexImage2D, sin decodificar JPEG ni PNG al arrancar.
+
+Uso: python recursos.py   (cocina por adelantado todas las imágenes del juego)
+"""
+import hashlib
+import os
+import sys
+import numpy as np
+import pygame
+from cache import CACHE_ROOT
+
+COOK_VERSION = 1  # cambiarlo invalida todo el caché si cambia el formato
+HEADER_BYTES = 32  # magic, versión, ancho, alto, canales, niveles (uint32) y relleno
+MAGIC = 0x58545050  # "PPTX"
+CACHE_DIR = os.path.join(CACHE_ROOT, "texturas")  # dentro de la raíz común de cachés (cache.py)
+
+SKYBOX_IMAGES = [
+    "Resource/Backgrounds/frente_2.jpg",
+    "Resource/Backgrounds/izquierda_2.jpg",
+    "Resource/Backgrounds/derecha_2.jpg",
+    "Resource/Backgrounds/arriba_2.jpg",
+    "Resource/Backgrounds/abajo_2.jpg",
+]
+DEFEAT_IMAGE = "Resource/MEMES/A-dar-lastima-a-otro-lado.jpg"
+VICTORY_GIF = "Resource/MEMES/gmod-skeleton.gif"
+INSTRUCTION_IMAGES = [
+    "Resource/Instructions/instruccion 1.PNG",
+    "Resource/Instructions/instruccion 2.PNG",
+    "Resource/Instructions/instruccion 3.PNG",
+    "Resource/Instructions/instruccion 4.PNG",
+]
+
+
+def resource_path(relative_path):
+    try:
+        # PyInstaller crea una carpeta temporal y guarda la ruta en _MEIPASS
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+def mip_chain(pixels):
+    """Niveles de mipmap de pixels (alto, ancho, canales) uint8 promediando bloques de 2x2.
+
+    Cada nivel mide max(1, lado // 2) del anterior, como exige OpenGL para texturas de cualquier tamaño.
+    """
+    levels = [pixels]
+    while pixels.shape[0] > 1 or pixels.shape[1] > 1:
+        block = pixels.astype(np.uint16)
+        for axis in (0, 1):
+            size = block.shape[axis]
+            if size == 1:
+                block = np.concatenate([block, block], axis=axis)  # Ese lado ya no se reduce
+            elif size % 2:
+                block = np.delete(block, size - 1, axis=axis)  # floor(lado / 2): se descarta la última fila
+        pixels = ((block[0::2, 0::2] + block[1::2, 0::2] + block[0::2, 1::2] + block[1::2, 1::2] + 2) // 4
+                  ).astype(np.uint8)
+        levels.append(pixels)
+    return levels
+
+
+class CookedImage:
+    """Imagen cocinada abierta con np.memmap: levels es una lista de (ancho, alto, píxeles) sin copiar."""
+
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=np.uint32, count=HEADER_BYTES // 4)
+        magic, version, width, height, channels, count = (int(value) for value in header[:6])
+        if magic != MAGIC or version != COOK_VERSION:
+            raise ValueError(f"{path} no es una textura cocinada compatible")
+        self.width, self.height, self.channels = width, height, channels
+        self.mode = "RGBA" if channels == 4 else "RGB"
+        self.data = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_BYTES)
+        self.levels = []
+        offset = 0
+        for _ in range(count):
+            size = width * height * channels
+            self.levels.append((width, height, self.data[offset:offset + size]))
+            offset += size
+            width, height = max(1, width // 2), max(1, height // 2)
+
+    @classmethod
+    def from_levels(cls, levels, mode):
+        """Imagen sin archivo, con los niveles de mip_chain en memoria (si el caché no se pudo escribir)."""
+        image = cls.__new__(cls)
+        image.height, image.width, image.channels = levels[0].shape
+        image.mode = mode
+        image.data = None
+        image.levels = [(level.shape[1], level.shape[0], level.reshape(-1)) for level in levels]
+        return image
+
+    def surface(self):
+        """Nivel 0 como Surface de pygame (para las pantallas que no usan OpenGL)."""
+        width, height, pixels = self.levels[0]
+        return pygame.image.frombytes(pixels.tobytes(), (width, height), self.mode)
+
+
+def cook(path, mode="RGB", flipped=False, mipmaps=True, cache_dir=None):
+    """Devuelve la imagen path cocinada, decodificándola y guardándola en el caché solo si hace falta.
+
+    La clave es el hash del archivo fuente junto con mode, flipped (fila inferior primero, como espera
+    glTexImage2D con coordenadas de textura sin invertir) y mipmaps.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    with open(path, "rb") as source:
+        digest = hashlib.sha256(source.read())
+    digest.update(repr((COOK_VERSION, mode, flipped, mipmaps)).encode())
+    cooked_path = os.path.join(cache_dir, digest.hexdigest()[:32] + ".tex")
+    if os.path.exists(cooked_path):
+        try:
+            return CookedImage(cooked_path)
+        except (OSError, ValueError) as e:
+            print(f"Advertencia: caché de texturas dañado ({e}); se vuelve a cocinar")
+
+    image = pygame.image.load(path)
+    width, height = image.get_size()
+    channels = len(mode)
+    pixels = np.frombuffer(pygame.image.tobytes(image, mode, flipped), dtype=np.uint8)
+    pixels = pixels.reshape(height, width, channels)
+    levels = mip_chain(pixels) if mipmaps else [pixels]
+
+    header = np.zeros(HEADER_BYTES // 4, dtype=np.uint32)
+    header[:6] = (MAGIC, COOK_VERSION, width, height, channels, len(levels))
+    temporary = f"{cooked_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(temporary, "wb") as cooked:
+            cooked.write(header.tobytes())
+            for level in levels:
+                cooked.write(np.ascontiguousarray(level).tobytes())
+        os.replace(temporary, cooked_path)  # Atómico: otro proceso nunca ve un archivo a medias
+    except OSError as e:
+        # Sin permisos, solo lectura o disco lleno: el caché es una optimización, se sigue en memoria
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        print(f"Advertencia: no se pudo guardar el caché de texturas: {e}")
+        return CookedImage.from_levels(levels, mode)
+    return CookedImage(cooked_path)
+
+
+def atlas_grid(count, width, height, max_size):
+    """(columnas, filas, escala) de una rejilla casi cuadrada de count cuadros width x height.
+
+    escala < 1 indica cuánto reducir cada cuadro para que la rejilla quepa en una textura de max_size.
+    """
+    columns = max(1, min(count, int(np.ceil(np.sqrt(count * height / width)))))
+    rows = -(-count // columns)
+    scale = min(1.0, max_size / (columns * width), max_size / (rows * height))
+    return columns, rows, scale
+
+
+def decode_gif_atlas(path, max_size):
+    """Decodifica todos los fotogramas de un GIF en una rejilla RGB (fila superior primero).
+
+    Devuelve (píxeles (alto, ancho, 3) uint8, rectángulo (u0, v0, u1, v1) de cada fotograma). Si la rejilla
+    no cabe en una textura de max_size se reducen los fotogramas.
+    """
+    from PIL import Image  # Pillow solo se usa aquí
+
+    gif = Image.open(path)  # Abre el GIF con Pillow
+    gif_frames = []
+    for frame in range(gif.n_frames):  # Iterar sobre todos los fotogramas
+        gif.seek(frame)  # Moverse al siguiente fotograma
+        gif_frames.append(gif.convert("RGB"))  # Colores originales a partir de la paleta
+
+    width, height = gif_frames[0].size
+    columns, rows, scale = atlas_grid(len(gif_frames), width, height, max_size)
+    if scale < 1.0:  # No cabe en una textura: se reducen los fotogramas
+        width, height = max(1, int(width * scale)), max(1, int(height * scale))
+        gif_frames = [frame.resize((width, height), Image.BILINEAR) for frame in gif_frames]
+
+    atlas = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+    frames = []
+    for i, frame in enumerate(gif_frames):
+        row, column = divmod(i, columns)
+        atlas[row * height:(row + 1) * height, column * width:(column + 1) * width] = np.asarray(frame)
+        frames.append((column / columns, row / rows, (column + 1) / columns, (row + 1) / rows))
+    return atlas, frames
+
+
+def cooked_assets():
+    """(ruta, argumentos de cook) de cada imagen que el juego carga, tal como la pide en ejecución."""
+    for path in SKYBOX_IMAGES:
+        yield path, dict(mode="RGB", flipped=True)
+    yield DEFEAT_IMAGE, dict(mode="RGB", flipped=False)
+    for path in INSTRUCTION_IMAGES:
+        yield path, dict(mode="RGBA", mipmaps=False)
+
+
+if __name__ == "__main__":
+    for relative_path, options in cooked_assets():
+        try:
+            image = cook(resource_path(relative_path), **options)
+            print(f"{relative_path}: {image.width}x{image.height}, {len(image.levels)} niveles")
+        except (OSError, pygame.error) as e:
+            print(f"{relative_path}: no se pudo cocinar ({e})")
@@ -0,0 +1,700 @@
+#renderizado.py
+"""Backends de render intercambiables para Animation.
+
+- "legacy": el camino de función fija de siempre (glBegin, gluSphere, display lists, luz de OpenGL); el
+  código de dibujo vive en Animation y LegacyRenderer solo lo conecta.
+- "core": OpenGL 3.3 core profile. Todo se dibuja con VAOs/VBOs y shaders GLSL: la cámara y la luz van
+  en uniform buffers y las esferas usan Phong por píxel con los mismos parámetros que init_lighting.
+
+Los dos exponen la misma interfaz:
+    camera_matrices() -> (vista, proyección, viewport) como arreglos 4x4 por filas
+    viewport, max_texture_size  consultados una vez al crearse, cuando el contexto ya existe
+    render(animation)  dibuja el cuadro de la pantalla actual (juego, pausa, victoria o derrota)
+
+Ninguno dibuja directamente: cada cuadro envía sus comandos a una RenderQueue, que los ordena por estado
+y aplica solo los cambios de estado necesarios entre uno y otro.
+"""
+import ctypes
+from operator import itemgetter
+import numpy as np
+import pygame
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileProgram, compileShader
+from OpenGL.GLU import gluLookAt, gluOrtho2D, gluPerspective
+from mallas import box_edges, room_quads
+
+FIELD_OF_VIEW = 45.0  # grados, vertical
+NEAR, FAR = 0.1, 50.0
+EYE = (0.0, 0.0, 21.0)  # la cámara mira al origen desde +z
+
+# Misma luz y material que Animation.init_lighting
+LIGHT_DIRECTION = (1.0, 1.0, 1.0)  # GL_POSITION con w = 0, fijada con la vista de la cámara
+LIGHT_AMBIENT = 0.4 + 0.2  # ambiente de GL_LIGHT0 más el ambiente global por defecto de OpenGL
+LIGHT_DIFFUSE = 1.0
+LIGHT_SPECULAR = 1.5  # especular de la luz (el del material es 1.0)
+SHININESS = 80.0
+
+RENDERERS = ("legacy", "core")
+
+# Pases de la cola de render en orden de dibujo. Las caras de la habitación y las partículas no usan prueba
+# de profundidad, así que el orden entre pases es el de siempre (el fondo primero, la interfaz al final).
+ROOM_PASS = 0  # caras texturizadas de la habitación e imagen de derrota
+WIREFRAME_PASS = 1  # aristas de la habitación, encima de sus caras
+SPHERE_PASS = 2  # esferas y caritas, con prueba de profundidad
+PARTICLE_PASS = 3  # partículas, encima de las esferas
+SCREEN_PASS = 4  # coordenadas de pantalla (proyección ortográfica en píxeles): textos, GIF y caritas tristes
+PASS_STATES = (  # (proyección de pantalla, prueba de profundidad) de cada pase
+    (False, False),
+    (False, False),
+    (False, True),
+    (False, False),
+    (True, False),
+)
+
+# Claves de shader de la función fija; los programas GLSL usan su id de OpenGL (mayor que 0)
+LIT = 0  # sin programa, con GL_LIGHTING (estado que deja init_lighting)
+UNLIT = -1  # sin programa ni iluminación (texto)
+NO_TEXTURE = 0
+
+# (pantalla, profundidad, shader, textura, blending) al empezar y al terminar cada cuadro
+DEFAULT_STATE = (False, False, LIT, NO_TEXTURE, False)
+
+
+def perspective(fovy, aspect, near, far):
+    """Matriz de proyección de gluPerspective (por filas)."""
+    f = 1.0 / np.tan(np.radians(fovy) / 2.0)
+    return np.array([[f / aspect, 0.0, 0.0, 0.0],
+                     [0.0, f, 0.0, 0.0],
+                     [0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)],
+                     [0.0, 0.0, -1.0, 0.0]])
+
+
+def look_at(eye, center=(0.0, 0.0, 0.0), up=(0.0, 1.0, 0.0)):
+    """Matriz de vista de gluLookAt (por filas)."""
+    eye, center, up = (np.asarray(v, dtype=np.float64) for v in (eye, center, up))
+    forward = (center - eye) / np.linalg.norm(center - eye)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    up = np.cross(side, forward)
+    view = np.eye(4)
+    view[0, :3], view[1, :3], view[2, :3] = side, up, -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view
+
+
+def ortho(width, height):
+    """Proyección de gluOrtho2D(0, width, 0, height): coordenadas en píxeles con y hacia arriba."""
+    return np.array([[2.0 / width, 0.0, 0.0, -1.0],
+                     [0.0, 2.0 / height, 0.0, -1.0],
+                     [0.0, 0.0, -1.0, 0.0],
+                     [0.0, 0.0, 0.0, 1.0]])
+
+
+def upload_cooked_texture(texture_id, image):
+    """Sube a texture_id todos los niveles de una recursos.CookedImage directamente desde su mmap."""
+    glBindTexture(GL_TEXTURE_2D, texture_id)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)  # Filas RGB sin relleno
+    pixel_format = GL_RGBA if image.channels == 4 else GL_RGB
+    for level, (width, height, pixels) in enumerate(image.levels):
+        glTexImage2D(GL_TEXTURE_2D, level, pixel_format, width, height, 0, pixel_format, GL_UNSIGNED_BYTE, pixels)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(image.levels) - 1)
+    min_filter = GL_LINEAR_MIPMAP_LINEAR if len(image.levels) > 1 else GL_LINEAR
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, min_filter)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+
+
+def upload_pixels_texture(texture_id, pixels):
+    """Sube una imagen (alto, ancho, 3 o 4) uint8 con la fila superior primero, sin mipmaps."""
+    pixel_format = GL_RGBA if pixels.shape[2] == 4 else GL_RGB
+    glBindTexture(GL_TEXTURE_2D, texture_id)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+    glPixelStorei(GL_UNPACK_ALIGNMENT, 1)  # Filas RGB sin relleno
+    glTexImage2D(GL_TEXTURE_2D, 0, pixel_format, pixels.shape[1], pixels.shape[0], 0, pixel_format,
+                 GL_UNSIGNED_BYTE, np.ascontiguousarray(pixels))
+    glBindTexture(GL_TEXTURE_2D, 0)
+
+
+def request_context(name):
+    """Atributos de pygame para el contexto que necesita el backend; llamar antes de display.set_mode."""
+    if name == "core":
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 3)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_CORE)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_FLAGS, pygame.GL_CONTEXT_FORWARD_COMPATIBLE_FLAG)
+    else:  # Contexto por defecto: compatibilidad, con la función fija disponible
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 0)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 0)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, 0)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_FLAGS, 0)
+
+
+class RenderQueue:
+    """Comandos de dibujo de un cuadro, ordenados para cambiar el estado de OpenGL lo menos posible.
+
+    Cada comando lleva su pase, shader, textura y blending. flush los ordena por (pase, blending, shader,
+    textura): dentro de un pase los translúcidos van después de los opacos, y los comandos con el mismo
+    estado conservan el orden en que se enviaron. setters son las funciones del backend que aplican cada
+    componente de (pantalla, profundidad, shader, textura, blending); solo se llaman cuando su valor cambia.
+    """
+
+    def __init__(self, setters):
+        self.setters = setters
+        self.commands = []
+        self.state_changes = 0  # del último cuadro
+        self.draw_calls = 0
+
+    def submit(self, render_pass, shader, texture, blend, draw, *args):
+        """draw(*args) emite el dibujo sin tocar el estado y devuelve cuántas llamadas de dibujo hizo."""
+        self.commands.append(((render_pass, blend, shader, texture), draw, args))
+
+    def flush(self):
+        """Ejecuta los comandos en orden de estado y vuelve a DEFAULT_STATE; devuelve (cambios, llamadas)."""
+        self.commands.sort(key=itemgetter(0))  # sort es estable: se mantiene el orden de envío
+        current = DEFAULT_STATE
+        changes = calls = 0
+        for (render_pass, blend, shader, texture), draw, args in self.commands:
+            state = (*PASS_STATES[render_pass], shader, texture, blend)
+            changes += self.apply(current, state)
+            current = state
+            calls += draw(*args)
+        changes += self.apply(current, DEFAULT_STATE)
+        self.commands.clear()
+        self.state_changes, self.draw_calls = changes, calls
+        return changes, calls
+
+    def apply(self, current, state):
+        changes = 0
+        for setter, old, new in zip(self.setters, current, state):
+            if old != new:
+                setter(new)
+                changes += 1
+        return changes
+
+
+def create_renderer(name, animation):
+    """Crea el backend name para animation; lanza RuntimeError si el contexto actual no lo soporta."""
+    if name == "core":
+        return CoreRenderer(animation)
+    if name == "legacy":
+        return LegacyRenderer(animation)
+    raise ValueError(f"Backend de render desconocido: {name}")
+
+
+class LegacyRenderer:
+    """Función fija de OpenGL: configura la cámara y la luz, y envía a la cola los dibujos de Animation."""
+
+    name = "legacy"
+
+    def __init__(self, animation):
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(FIELD_OF_VIEW, animation.width / animation.height, NEAR, FAR)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+        gluLookAt(*EYE, 0, 0, 0, 0, 1, 0)
+        self.camera = None
+        self.viewport = [int(v) for v in glGetIntegerv(GL_VIEWPORT)]
+        self.max_texture_size = int(glGetIntegerv(GL_MAX_TEXTURE_SIZE))
+        animation.load_victory_gif(self.max_texture_size)
+        animation.load_legacy_resources()
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self.queue = RenderQueue((self.set_screen, self.set_depth_test, self.set_shader, self.set_texture,
+                                  self.set_blend))
+
+    def camera_matrices(self):
+        """Se leen de OpenGL la primera vez y se reutilizan: la cámara no se mueve."""
+        if self.camera is None:
+            modelview = np.array(glGetDoublev(GL_MODELVIEW_MATRIX)).T  # OpenGL las entrega por columnas
+            projection = np.array(glGetDoublev(GL_PROJECTION_MATRIX)).T
+            self.camera = (modelview, projection, self.viewport)
+        return self.camera
+
+    def set_screen(self, screen):
+        """Entra en la proyección ortográfica en píxeles (guardando las matrices de la cámara) o sale de ella."""
+        if screen:
+            viewport = self.camera_matrices()[2]
+            glMatrixMode(GL_PROJECTION)
+            glPushMatrix()
+            glLoadIdentity()
+            gluOrtho2D(0, viewport[2], 0, viewport[3])
+            glMatrixMode(GL_MODELVIEW)
+            glPushMatrix()
+            glLoadIdentity()
+        else:
+            glPopMatrix()
+            glMatrixMode(GL_PROJECTION)
+            glPopMatrix()
+            glMatrixMode(GL_MODELVIEW)
+
+    @staticmethod
+    def set_depth_test(enabled):
+        (glEnable if enabled else glDisable)(GL_DEPTH_TEST)
+
+    @staticmethod
+    def set_shader(shader):
+        """LIT y UNLIT son la función fija con y sin GL_LIGHTING; cualquier otro valor es un programa GLSL."""
+        if shader in (LIT, UNLIT):
+            glUseProgram(0)
+            (glEnable if shader == LIT else glDisable)(GL_LIGHTING)
+        else:
+            glUseProgram(shader)
+
+    @staticmethod
+    def set_texture(texture):
+        if texture == NO_TEXTURE:
+            glBindTexture(GL_TEXTURE_2D, 0)
+            glDisable(GL_TEXTURE_2D)
+        else:
+            glEnable(GL_TEXTURE_2D)
+            glBindTexture(GL_TEXTURE_2D, texture)
+
+    @staticmethod
+    def set_blend(enabled):
+        (glEnable if enabled else glDisable)(GL_BLEND)
+
+    def submit_text(self, font, batch):
+        self.queue.submit(SCREEN_PASS, UNLIT, font.texture, True, font.draw_arrays, batch.vertices, batch.uvs)
+
+    def render(self, animation):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)  # Limpia la pantalla en cada renderizado
+        queue = self.queue
+        state = animation.state
+        viewport = self.camera_matrices()[2]
+        width, height = viewport[2], viewport[3]
+
+        if state.victory:
+            animation.draw_color_changing_background()  # Fondo dinámico
+            self.submit_text(animation.font,
+                             animation.text_batch("victory", animation.victory_lines(width // 2, height // 2)))
+            queue.submit(SCREEN_PASS, LIT, NO_TEXTURE, False, animation.draw_particles)  # Confeti
+            if animation.victory_gif_texture is not None:
+                queue.submit(SCREEN_PASS, LIT, animation.victory_gif_texture, False, animation.draw_victory_gif)
+        elif state.lost:
+            if animation.defeat_texture_id:
+                queue.submit(ROOM_PASS, LIT, animation.defeat_texture_id, False, animation.draw_defeat_image)
+            self.submit_text(animation.font,
+                             animation.text_batch("defeat", animation.defeat_lines(width // 2, height // 2)))
+            queue.submit(SCREEN_PASS, LIT, NO_TEXTURE, False, animation.draw_sad_faces)
+        else:
+            for face, texture in enumerate(animation.texture_ids):
+                queue.submit(ROOM_PASS, LIT, texture, False, animation.draw_room_face, face)
+            queue.submit(WIREFRAME_PASS, LIT, NO_TEXTURE, False, animation.draw_cube_wireframe)
+            levels = animation.detail_levels()
+            if animation.sphere_renderer is not None:
+                queue.submit(SPHERE_PASS, animation.sphere_renderer.program, NO_TEXTURE, False,
+                             animation.draw_spheres_instanced, levels)
+                queue.submit(SPHERE_PASS, LIT, NO_TEXTURE, False, animation.draw_faces)
+            else:  # gluSphere o SphereShader: cada esfera con su propio estado, en un solo comando
+                queue.submit(SPHERE_PASS, LIT, NO_TEXTURE, False, animation.draw_spheres, levels)
+            queue.submit(PARTICLE_PASS, LIT, NO_TEXTURE, False, animation.draw_particles)
+            self.submit_text(animation.font, animation.text_batch("hud", animation.hud_lines(width, height)))
+            if state.paused:
+                self.submit_text(animation.font,
+                                 animation.text_batch("pause", animation.pause_lines(width // 2, height // 2)))
+
+        animation.state_changes, animation.draw_calls = queue.flush()
+
+
+# GLSL 3.30 core: nada de la función fija; matrices y luz en uniform buffers (std140)
+CORE_SPHERE_VERTEX_SHADER = """
+#version 330 core
+layout(std140) uniform Camera {
+    mat4 view;
+    mat4 projection;
+};
+layout(location = 0) in vec3 a_vertex;  // esfera unitaria: posición y normal
+layout(location = 1) in vec4 a_sphere;  // centro xyz, radio
+layout(location = 2) in vec4 a_color;  // rgb, ángulo de rotación en grados
+out vec3 v_color;
+out vec3 v_normal;
+out vec3 v_view;
+
+// Igual que glRotatef(angle, 1, 1, 0)
+vec3 rotate(vec3 v, float degrees) {
+    vec3 k = vec3(0.70710678, 0.70710678, 0.0);
+    float c = cos(radians(degrees));
+    float s = sin(radians(degrees));
+    return v * c + cross(k, v) * s + k * dot(k, v) * (1.0 - c);
+}
+
+void main() {
+    vec3 local = rotate(a_vertex, a_color.w);
+    vec4 eye = view * vec4(a_sphere.xyz + local * a_sphere.w, 1.0);
+    v_color = a_color.rgb;
+    v_normal = mat3(view) * local;  // La vista es rígida: su parte 3x3 sirve como matriz de normales
+    v_view = -eye.xyz;
+    gl_Position = projection * eye;
+}
+"""
+
+CORE_SPHERE_FRAGMENT_SHADER = """
+#version 330 core
+layout(std140) uniform Light {
+    vec4 direction;  // hacia la luz, en coordenadas de la cámara
+    vec4 ambient;
+    vec4 diffuse;
+    vec4 specular;  // especular de la luz por el del material
+    vec4 shininess;  // x: exponente del brillo especular
+};
+in vec3 v_color;
+in vec3 v_normal;
+in vec3 v_view;
+out vec4 frag_color;
+
+void main() {
+    vec3 n = normalize(v_normal);
+    vec3 l = normalize(direction.xyz);
+    float lambert = max(dot(n, l), 0.0);
+    vec3 color = v_color * (ambient.rgb + diffuse.rgb * lambert);
+    if (lambert > 0.0) {
+        vec3 h = normalize(l + normalize(v_view));
+        color += specular.rgb * pow(max(dot(n, h), 0.0), shininess.x);
+    }
+    frag_color = vec4(color, 1.0);
+}
+"""
+
+CORE_COLOR_VERTEX_SHADER = """
+#version 330 core
+layout(std140) uniform Camera {
+    mat4 view;
+    mat4 projection;
+};
+layout(location = 0) in vec3 a_position;
+layout(location = 1) in vec4 a_color;
+layout(location = 2) in float a_size;  // tamaño de punto en píxeles
+out vec4 v_color;
+
+void main() {
+    v_color = a_color;
+    gl_PointSize = a_size;
+    gl_Position = projection * view * vec4(a_position, 1.0);
+}
+"""
+
+CORE_COLOR_FRAGMENT_SHADER = """
+#version 330 core
+in vec4 v_color;
+out vec4 frag_color;
+
+void main() {
+    frag_color = v_color;
+}
+"""
+
+CORE_TEXTURE_VERTEX_SHADER = """
+#version 330 core
+layout(std140) uniform Camera {
+    mat4 view;
+    mat4 projection;
+};
+layout(location = 0) in vec3 a_position;
+layout(location = 1) in vec2 a_uv;
+out vec2 v_uv;
+
+void main() {
+    v_uv = a_uv;
+    gl_Position = projection * view * vec4(a_position, 1.0);
+}
+"""
+
+CORE_TEXTURE_FRAGMENT_SHADER = """
+#version 330 core
+uniform sampler2D u_texture;
+uniform vec4 u_tint;
+in vec2 v_uv;
+out vec4 frag_color;
+
+void main() {
+    frag_color = texture(u_texture, v_uv) * u_tint;
+}
+"""
+
+COLOR_FLOATS = 8  # x, y, z, r, g, b, a, tamaño de punto
+TEXTURE_FLOATS = 5  # x, y, z, u, v
+QUAD_TRIANGLES = np.array([0, 1, 2, 0, 2, 3])  # Un quad (4 vértices) como dos triángulos
+
+
+def quads_to_triangles(quads):
+    """Vértices de quads consecutivos (4N, ...) reordenados como triángulos (6N, ...)."""
+    order = (np.arange(len(quads) // 4)[:, None] * 4 + QUAD_TRIANGLES).ravel()
+    return quads[order]
+
+
+def color_vertices(positions, color, size=1.0):
+    """Arreglo (N, COLOR_FLOATS) para el programa de color; color y size pueden ser por vértice."""
+    data = np.empty((len(positions), COLOR_FLOATS), dtype=np.float32)
+    data[:, 0:3] = 0.0
+    data[:, 0:np.shape(positions)[1]] = positions
+    data[:, 3:7] = 1.0
+    data[:, 3:3 + np.shape(color)[-1]] = color
+    data[:, 7] = size
+    return data
+
+
+class StreamBuffer:
+    """VAO con un VBO de atributos float32 intercalados; cada draw sube los datos (GL_STREAM_DRAW)."""
+
+    def __init__(self, sizes):
+        self.floats = sum(sizes)
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        offset = 0
+        for location, size in enumerate(sizes):
+            glEnableVertexAttribArray(location)
+            glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, self.floats * 4, ctypes.c_void_p(offset))
+            offset += size * 4
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def upload(self, data, usage=GL_STREAM_DRAW):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, usage)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self, mode, first, count):
+        glBindVertexArray(self.vao)
+        glDrawArrays(mode, first, count)
+        glBindVertexArray(0)
+
+
+class CoreFont:
+    """Fuente para el backend core: atlas de glifos, su textura y draw_arrays, como texto.BitmapFont."""
+
+    MAX_CACHED_BATCHES = 16
+
+    def __init__(self, renderer, atlas=None):
+        from texto import GlyphAtlas
+
+        self.renderer = renderer
+        self.atlas = atlas if atlas is not None else GlyphAtlas()
+        pixels = np.frombuffer(self.atlas.pixels, dtype=np.uint8).reshape(self.atlas.height, self.atlas.width, 4)
+        self.texture = glGenTextures(1)
+        upload_pixels_texture(self.texture, pixels)
+        self.triangles = {}  # id de los vértices de un lote -> (vértices, triángulos listos para el VBO)
+
+    def draw_arrays(self, vertices, uvs, color=(1.0, 1.0, 1.0)):
+        """Dibuja los quads de un TextBatch; se pasan a triángulos solo cuando el lote cambia."""
+        if not len(vertices):
+            return 0
+        cached = self.triangles.get(id(vertices))
+        if cached is None or cached[0] is not vertices:
+            data = np.zeros((len(vertices), TEXTURE_FLOATS), dtype=np.float32)
+            data[:, 0:2] = vertices
+            data[:, 3:5] = uvs
+            if len(self.triangles) >= self.MAX_CACHED_BATCHES:
+                self.triangles.clear()
+            cached = self.triangles[id(vertices)] = (vertices, quads_to_triangles(data))
+        return self.renderer.draw_textured(cached[1], (*color, 1.0))
+
+
+class CoreRenderer:
+    """OpenGL 3.3 core profile: VAOs/VBOs, uniform buffers para cámara y luz, y shaders Phong."""
+
+    name = "core"
+
+    def __init__(self, animation):
+        version = glGetString(GL_VERSION)
+        major, minor = (int(part) for part in version.split()[0].split(b".")[:2])
+        if (major, minor) < (3, 3):
+            raise RuntimeError(f"se necesita OpenGL 3.3 y el contexto es {version.decode()}")
+        from sombreadores import InstancedSphereRenderer
+
+        self.view = look_at(EYE)
+        self.projection = perspective(FIELD_OF_VIEW, animation.width / animation.height, NEAR, FAR)
+        self.viewport = [int(v) for v in glGetIntegerv(GL_VIEWPORT)]
+        self.max_texture_size = int(glGetIntegerv(GL_MAX_TEXTURE_SIZE))
+        animation.load_victory_gif(self.max_texture_size)
+        # Contenido del uniform buffer de la cámara (por columnas) para el mundo y para la pantalla
+        self.cameras = {
+            False: np.concatenate([self.view.T.ravel(), self.projection.T.ravel()]).astype(np.float32),
+            True: np.concatenate([np.eye(4).ravel(), ortho(self.viewport[2], self.viewport[3]).T.ravel()]
+                                 ).astype(np.float32),
+        }
+
+        self.spheres = InstancedSphereRenderer(animation.lod.meshes, CORE_SPHERE_VERTEX_SHADER,
+                                               CORE_SPHERE_FRAGMENT_SHADER)
+        self.color_program = compileProgram(compileShader(CORE_COLOR_VERTEX_SHADER, GL_VERTEX_SHADER),
+                                            compileShader(CORE_COLOR_FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+        self.texture_program = compileProgram(compileShader(CORE_TEXTURE_VERTEX_SHADER, GL_VERTEX_SHADER),
+                                              compileShader(CORE_TEXTURE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+        self.tint_location = glGetUniformLocation(self.texture_program, "u_tint")
+        glUseProgram(self.texture_program)
+        glUniform1i(glGetUniformLocation(self.texture_program, "u_texture"), 0)
+        glUseProgram(0)
+        self.color_buffer = StreamBuffer((3, 4, 1))
+        self.texture_buffer = StreamBuffer((3, 2))
+        self.create_uniform_buffers()
+
+        # La habitación no cambia: sus caras y aristas se suben una sola vez
+        self.room_buffer = StreamBuffer((3, 2))
+        self.room_buffer.upload(quads_to_triangles(room_quads(animation.state.bounds).reshape(-1, 5)),
+                                GL_STATIC_DRAW)
+        self.edges = color_vertices(box_edges(animation.state.bounds), (1.0, 1.0, 1.0))
+
+        self.room_textures = glGenTextures(len(animation.skybox_images))
+        for texture, image in zip(self.room_textures, animation.skybox_images):
+            upload_cooked_texture(texture, image)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        self.defeat_texture = None
+        if animation.defeat_image is not None:
+            self.defeat_texture = glGenTextures(1)
+            upload_cooked_texture(self.defeat_texture, animation.defeat_image)
+        self.victory_texture = None
+        if animation.victory_gif_pixels is not None:
+            self.victory_texture = glGenTextures(1)
+            upload_pixels_texture(self.victory_texture, animation.victory_gif_pixels)
+        self.sad_faces = (None, None)  # (lista de caritas, vértices) para reconstruir solo si cambian
+
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glEnable(GL_PROGRAM_POINT_SIZE)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        animation.font = CoreFont(self)
+        self.queue = RenderQueue((self.set_screen, self.set_depth_test, glUseProgram, self.set_texture,
+                                  self.set_blend))
+
+    def create_uniform_buffers(self):
+        """Cámara (binding 0) y luz (binding 1) en uniform buffers std140; la luz no cambia durante la partida."""
+        direction = self.view[:3, :3] @ LIGHT_DIRECTION
+        light = np.array([*direction / np.linalg.norm(direction), 0.0,
+                          LIGHT_AMBIENT, LIGHT_AMBIENT, LIGHT_AMBIENT, 1.0,
+                          LIGHT_DIFFUSE, LIGHT_DIFFUSE, LIGHT_DIFFUSE, 1.0,
+                          LIGHT_SPECULAR, LIGHT_SPECULAR, LIGHT_SPECULAR, 1.0,
+                          SHININESS, 0.0, 0.0, 0.0], dtype=np.float32)
+        self.uniform_buffers = glGenBuffers(2)
+        for binding, data in enumerate((self.cameras[False], light)):
+            glBindBuffer(GL_UNIFORM_BUFFER, self.uniform_buffers[binding])
+            glBufferData(GL_UNIFORM_BUFFER, data.nbytes, data, GL_DYNAMIC_DRAW if binding == 0 else GL_STATIC_DRAW)
+            glBindBufferBase(GL_UNIFORM_BUFFER, binding, self.uniform_buffers[binding])
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        for program in (self.spheres.program, self.color_program, self.texture_program):
+            for binding, name in enumerate(("Camera", "Light")):
+                index = glGetUniformBlockIndex(program, name)
+                if index != GL_INVALID_INDEX:  # Solo el programa de las esferas usa la luz
+                    glUniformBlockBinding(program, index, binding)
+
+    def camera_matrices(self):
+        return self.view, self.projection, self.viewport
+
+    def set_screen(self, screen):
+        """Cambia el uniform buffer de la cámara entre la del mundo y la proyección en píxeles."""
+        glBindBuffer(GL_UNIFORM_BUFFER, self.uniform_buffers[0])
+        glBufferSubData(GL_UNIFORM_BUFFER, 0, self.cameras[screen].nbytes, self.cameras[screen])
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+
+    @staticmethod
+    def set_depth_test(enabled):
+        (glEnable if enabled else glDisable)(GL_DEPTH_TEST)
+
+    @staticmethod
+    def set_texture(texture):
+        glBindTexture(GL_TEXTURE_2D, texture)
+
+    @staticmethod
+    def set_blend(enabled):
+        (glEnable if enabled else glDisable)(GL_BLEND)
+
+    def draw_colored(self, mode, data):
+        """Puntos o líneas con color (y tamaño de punto) por vértice, con el programa de color activo."""
+        if not len(data):
+            return 0
+        self.color_buffer.upload(data)
+        self.color_buffer.draw(mode, 0, len(data))
+        return 1
+
+    def draw_textured(self, data, tint=(1.0, 1.0, 1.0, 1.0)):
+        """Triángulos texturizados (x, y, z, u, v) con el color tint multiplicado por la textura activa."""
+        glUniform4f(self.tint_location, *tint)
+        self.texture_buffer.upload(data)
+        self.texture_buffer.draw(GL_TRIANGLES, 0, len(data))
+        return 1
+
+    def draw_room_face(self, face):
+        glUniform4f(self.tint_location, 1.0, 1.0, 1.0, 1.0)
+        self.room_buffer.draw(GL_TRIANGLES, face * 6, 6)
+        return 1
+
+    def draw_spheres(self, animation, levels):
+        animation.triangles = self.spheres.draw(animation.state.field, levels)
+        return self.spheres.draw_calls
+
+    def submit_colored(self, render_pass, mode, data):
+        self.queue.submit(render_pass, self.color_program, NO_TEXTURE, False, self.draw_colored, mode, data)
+
+    def submit_textured(self, render_pass, texture, data, blend=False):
+        self.queue.submit(render_pass, self.texture_program, texture, blend, self.draw_textured, data)
+
+    def submit_text(self, font, batch):
+        self.queue.submit(SCREEN_PASS, self.texture_program, font.texture, True, font.draw_arrays,
+                          batch.vertices, batch.uvs)
+
+    def particle_vertices(self, animation):
+        particles = animation.state.particles
+        live = particles.draw_indices[:particles.collect()]
+        return color_vertices(particles.positions[live], particles.colors[live], 6.0)
+
+    def render(self, animation):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        state = animation.state
+        width, height = self.viewport[2], self.viewport[3]
+        if state.victory:
+            self.submit_victory(animation)
+        elif state.lost:
+            self.submit_defeat(animation)
+        else:
+            for face, texture in enumerate(self.room_textures):
+                self.queue.submit(ROOM_PASS, self.texture_program, texture, False, self.draw_room_face, face)
+            self.submit_colored(WIREFRAME_PASS, GL_LINES, self.edges)
+            self.queue.submit(SPHERE_PASS, self.spheres.program, NO_TEXTURE, False, self.draw_spheres, animation,
+                              animation.detail_levels())
+            eyes, mouths = animation.face_decals()
+            self.submit_colored(SPHERE_PASS, GL_POINTS, color_vertices(eyes, (0.0, 0.0, 0.0), 4.0))
+            self.submit_colored(SPHERE_PASS, GL_LINES, color_vertices(mouths, (0.0, 0.0, 0.0)))
+            self.submit_colored(PARTICLE_PASS, GL_POINTS, self.particle_vertices(animation))
+            self.submit_text(animation.font, animation.text_batch("hud", animation.hud_lines(width, height)))
+            if state.paused:
+                self.submit_text(animation.font,
+                                 animation.text_batch("pause", animation.pause_lines(width // 2, height // 2)))
+        animation.state_changes, animation.draw_calls = self.queue.flush()
+
+    def submit_victory(self, animation):
+        """Fondo de color cambiante, texto, confeti y el GIF animado (todo en píxeles como en legacy)."""
+        animation.draw_color_changing_background()
+        width, height = self.viewport[2], self.viewport[3]
+        self.submit_text(animation.font,
+                         animation.text_batch("victory", animation.victory_lines(width // 2, height // 2)))
+        self.submit_colored(SCREEN_PASS, GL_POINTS, self.particle_vertices(animation))
+        frame = animation.victory_gif_frame()
+        if frame is not None and self.victory_texture is not None:
+            u0, v0, u1, v1 = frame
+            x0, y0, x1, y1 = animation.victory_gif_rect(width, height)
+            quad = np.array([[x0, y0, 0, u0, v1], [x1, y0, 0, u1, v1], [x1, y1, 0, u1, v0], [x0, y1, 0, u0, v0]],
+                            dtype=np.float32)
+            self.submit_textured(SCREEN_PASS, self.victory_texture, quads_to_triangles(quad))
+
+    def submit_defeat(self, animation):
+        """Imagen de derrota en el mundo, texto y caritas tristes en píxeles."""
+        rect = animation.defeat_image_rect()
+        if rect is not None and self.defeat_texture is not None:
+            x0, y0, x1, y1 = rect
+            quad = np.array([[x0, y0, 0, 0, 1], [x1, y0, 0, 1, 1], [x1, y1, 0, 1, 0], [x0, y1, 0, 0, 0]],
+                            dtype=np.float32)
+            self.submit_textured(ROOM_PASS, self.defeat_texture, quads_to_triangles(quad))
+
+        width, height = self.viewport[2], self.viewport[3]
+        self.submit_text(animation.font,
+                         animation.text_batch("defeat", animation.defeat_lines(width // 2, height // 2)))
+        faces, vertices = self.sad_faces
+        if faces is not animation.sad_faces:  # Las caritas no se mueven: se arman una vez por derrota
+            eyes, sizes, mouths = animation.sad_face_geometry()
+            vertices = (color_vertices(eyes.reshape(-1, 2), (1.0, 1.0, 1.0), np.repeat(sizes * 0.25, 2)),
+                        color_vertices(mouths, (1.0, 1.0, 1.0)))
+            self.sad_faces = (animation.sad_faces, vertices)
+        self.submit_colored(SCREEN_PASS, GL_POINTS, vertices[0])
+        self.submit_colored(SCREEN_PASS, GL_LINES, vertices[1])
@@ -0,0 +1,472 @@
+#simulacion.py
+"""Simulación de las esferas sin dependencias de OpenGL."""
+import numpy as np
+
+# Ciclos de color: primas verde -> naranja -> amarillo, no primas rojo -> azul
+PRIME_COLOR_START = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+PRIME_COLOR_MID = np.array([1.0, 0.5, 0.0], dtype=np.float32)
+PRIME_COLOR_END = np.array([1.0, 1.0, 0.0], dtype=np.float32)
+NON_PRIME_COLOR_START = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+NON_PRIME_COLOR_END = np.array([0.0, 0.0, 1.0], dtype=np.float32)
+
+COLOR_PHASE_STEP = 0.01  # avance del ciclo de color por paso de referencia
+# La fase vuelve a empezar al pasar de 1.0; el período fijo (igual a 60 Hz que reiniciar a 0) no depende de
+# --sim-hz, y los shaders lo reciben como uniform para dar la vuelta en el mismo instante que la CPU
+COLOR_PHASE_PERIOD = 1.0 + COLOR_PHASE_STEP
+BASE_HZ = 60  # velocidades, rotaciones y fases están expresadas por paso de 1/60 s
+
+
+# Vecindario "medio cascarón": la celda propia más 13 vecinas, así cada par de celdas se revisa una vez
+_HALF_SHELL = [(dx, dy, dz) for dz in (0, 1) for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+               if dz > 0 or dy > 0 or (dy == 0 and dx >= 0)]
+
+
+class SpatialGrid:
+    """Rejilla uniforme (hash espacial) sobre el cubo de límites para encontrar pares de esferas cercanas.
+
+    Las celdas miden al menos el diámetro mayor, así que dos esferas que se tocan están en celdas vecinas.
+    La rejilla lleva una celda de relleno por lado para que las vecinas de los bordes nunca se confundan
+    con celdas de otra fila. El orden por celda se conserva entre ticks: como las esferas casi nunca
+    cambian de celda, reordenar el arreglo casi ordenado cuesta O(n).
+    """
+
+    def __init__(self):
+        self.order = np.zeros(0, dtype=np.intp)
+        self.cell_size = None
+        self.shape = None
+
+    def _configure(self, bounds, cell_size):
+        limits = np.asarray(bounds, dtype=np.float32)
+        self.cell_size = cell_size
+        self.origin = -limits
+        self.shape = np.maximum(np.ceil(2 * limits / cell_size).astype(np.int64), 1) + 2
+        nx, ny, _ = self.shape
+        self.offsets = np.array([dx + dy * nx + dz * nx * ny for dx, dy, dz in _HALF_SHELL], dtype=np.int64)
+
+    def pairs(self, positions, radii, bounds, index):
+        """Devuelve los pares candidatos (i, j) de índices de index que comparten celda o son vecinas."""
+        cell_size = max(2.0 * float(radii[index].max()), 1e-6)
+        if self.cell_size is None or cell_size > self.cell_size or not np.array_equal(-self.origin, bounds):
+            self._configure(bounds, cell_size)
+        if len(self.order) != len(index):
+            self.order = np.arange(len(index))
+
+        coords = ((positions[index] - self.origin) // self.cell_size).astype(np.int64)
+        coords = np.clip(coords, 0, self.shape - 3) + 1
+        cells = coords[:, 0] + self.shape[0] * (coords[:, 1] + self.shape[1] * coords[:, 2])
+
+        # Actualización incremental: se parte del orden del tick anterior (casi ordenado)
+        order = self.order[np.argsort(cells[self.order], kind="stable")]
+        self.order = order
+        sorted_cells = cells[order]
+
+        n = len(order)
+        firsts, seconds = [], []
+        for offset in self.offsets:
+            if offset == 0:
+                lo = np.arange(1, n + 1)  # en la propia celda solo los que vienen después
+            else:
+                lo = np.searchsorted(sorted_cells, sorted_cells + offset, side="left")
+            hi = np.searchsorted(sorted_cells, sorted_cells + offset, side="right")
+            counts = np.maximum(hi - lo, 0)
+            total = int(counts.sum())
+            if not total:
+                continue
+            starts = np.cumsum(counts) - counts
+            firsts.append(np.repeat(np.arange(n), counts))
+            seconds.append(np.repeat(lo - starts, counts) + np.arange(total))
+        if not firsts:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        return index[order[np.concatenate(firsts)]], index[order[np.concatenate(seconds)]]
+
+
+class SphereField:
+    """Estado de todas las esferas en arreglos contiguos float32 (estructura de arreglos).
+
+    La esfera i ocupa la fila i de cada arreglo; las esferas eliminadas solo se marcan con alive = False
+    hasta el próximo clear(). previous_* guarda el estado anterior al último paso para que el render
+    interpole entre los dos (render_positions / render_angles).
+    """
+
+    _ARRAYS = ("positions", "velocities", "radii", "rotation_angles", "rotation_speeds",
+               "color_phases", "alive", "is_prime", "numbers", "previous_positions",
+               "previous_angles", "render_positions", "render_angles")
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self.radii = np.zeros(capacity, dtype=np.float32)
+        self.rotation_angles = np.zeros(capacity, dtype=np.float32)
+        self.rotation_speeds = np.zeros(capacity, dtype=np.float32)
+        self.color_phases = np.zeros(capacity, dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.is_prime = np.zeros(capacity, dtype=bool)
+        self.numbers = np.zeros(capacity, dtype=np.int64)
+        self.previous_positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.previous_angles = np.zeros(capacity, dtype=np.float32)
+        self.render_positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.render_angles = np.zeros(capacity, dtype=np.float32)
+        self.grid = None  # SpatialGrid, se crea con el primer collide()
+        self.time = 0.0  # tiempo simulado en pasos de 1/60 s (para los shaders)
+        self.previous_time = 0.0
+        self.render_time = 0.0
+        self.version = 0  # cambia al agregar, quitar o reiniciar esferas (datos por instancia de la GPU)
+
+    def _grow(self):
+        """Duplica la capacidad de todos los arreglos."""
+        for name in self._ARRAYS:
+            array = getattr(self, name)
+            grown = np.zeros((2 * len(array),) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+
+    def add(self, num, radius, position, velocity, is_prime, rotation_speed):
+        """Agrega una esfera y devuelve su índice."""
+        if self.count == len(self.radii):
+            self._grow()
+        i = self.count
+        self.positions[i] = position
+        self.velocities[i] = velocity
+        self.radii[i] = radius
+        self.rotation_angles[i] = 0.0
+        self.rotation_speeds[i] = rotation_speed
+        self.color_phases[i] = 0.0
+        self.alive[i] = True
+        self.is_prime[i] = is_prime
+        self.numbers[i] = num
+        self.previous_positions[i] = self.render_positions[i] = self.positions[i]
+        self.previous_angles[i] = self.render_angles[i] = 0.0
+        self.count += 1
+        self.version += 1
+        return i
+
+    def clear(self):
+        """Elimina todas las esferas sin liberar memoria."""
+        self.alive[:self.count] = False
+        self.count = 0
+        self.version += 1
+
+    def step(self, bounds, index=None, dt=1.0 / BASE_HZ):
+        """Avanza dt segundos: movimiento, rotación, fase de color y rebote contra el cubo de límites.
+
+        index limita el paso a un subconjunto de esferas; por defecto avanza todas las vivas.
+        """
+        scale = np.float32(dt * BASE_HZ)
+        if index is None:
+            index = np.flatnonzero(self.alive[:self.count])
+            self.previous_time = self.time
+            self.time += float(scale)
+        self.previous_positions[index] = self.positions[index]
+        self.previous_angles[index] = self.rotation_angles[index]
+
+        positions = self.positions[index] + self.velocities[index] * scale
+        velocities = self.velocities[index]
+        radii = self.radii[index, None]
+
+        angles = self.rotation_angles[index] + self.rotation_speeds[index] * scale
+        self.rotation_angles[index] = np.where(angles >= 360.0, angles - 360.0, angles)
+        phases = self.color_phases[index] + COLOR_PHASE_STEP * scale
+        self.color_phases[index] = np.where(phases >= COLOR_PHASE_PERIOD, phases - COLOR_PHASE_PERIOD, phases)
+
+        # Rebote: se recoloca la esfera dentro del cubo y se invierte la componente de la velocidad
+        limits = np.asarray(bounds, dtype=np.float32)
+        below = positions - radii < -limits
+        above = positions + radii > limits
+        positions = np.where(below, radii - limits, np.where(above, limits - radii, positions))
+        self.velocities[index] = np.where(below | above, -velocities, velocities)
+        self.positions[index] = positions
+
+    def collide(self, bounds):
+        """Choques elásticos entre esferas (masa proporcional al volumen) usando la rejilla espacial."""
+        index = np.flatnonzero(self.alive[:self.count])
+        if len(index) < 2:
+            return
+        if self.grid is None:
+            self.grid = SpatialGrid()
+        i, j = self.grid.pairs(self.positions, self.radii, bounds, index)
+
+        # Fase fina vectorizada: solo los pares que se tocan
+        delta = self.positions[j] - self.positions[i]
+        distance = np.sqrt((delta * delta).sum(axis=1))
+        reach = self.radii[i] + self.radii[j]
+        touching = distance < reach
+        if not touching.any():
+            return
+        i, j, delta, distance, reach = i[touching], j[touching], delta[touching], distance[touching], reach[touching]
+        normal = delta / np.maximum(distance, 1e-6)[:, None]
+
+        mass_i = self.radii[i] ** 3
+        mass_j = self.radii[j] ** 3
+        share_i = (mass_j / (mass_i + mass_j))[:, None]
+        share_j = 1.0 - share_i
+        # Con varios contactos simultáneos se promedian las correcciones de cada esfera; sumarlas
+        # hace crecer la energía sin límite cuando las esferas están apiladas. Las dos esferas de un par
+        # usan el mismo divisor (el de la que tiene más contactos) para que los impulsos sigan siendo
+        # iguales y opuestos y el momento se conserve
+        contacts = np.bincount(np.concatenate([i, j]), minlength=self.count).astype(np.float32)
+        divisor = np.maximum(contacts[i], contacts[j])[:, None]
+        share_i = share_i / divisor
+        share_j = share_j / divisor
+
+        # Impulso solo si se acercan
+        approach = ((self.velocities[i] - self.velocities[j]) * normal).sum(axis=1)
+        impulse = (2.0 * np.maximum(approach, 0.0))[:, None] * normal
+        np.add.at(self.velocities, i, -impulse * share_i)
+        np.add.at(self.velocities, j, impulse * share_j)
+
+        # Separar las esferas superpuestas en proporción inversa a su masa
+        overlap = (reach - distance)[:, None] * normal
+        np.add.at(self.positions, i, -overlap * share_i)
+        np.add.at(self.positions, j, overlap * share_j)
+
+    def pick(self, origin, direction, positions=None):
+        """Índice de la esfera viva más cercana que cruza el rayo origin + t * direction (t > 0), o -1.
+
+        direction debe estar normalizada; positions permite usar las posiciones interpoladas del render.
+        """
+        n = self.count
+        if positions is None:
+            positions = self.positions
+        positions = positions[:n]
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+
+        # Base ortonormal (u, v) del plano perpendicular al rayo: las coordenadas de cada centro en ese
+        # plano dan su distancia al rayo sin la cancelación de |c|² - (c·d)² en float32
+        dx, dy, dz = direction
+        u = np.array([0.0, dz, -dy]) if abs(dx) < 0.9 else np.array([-dz, 0.0, dx])  # d × (eje x o y)
+        u /= np.sqrt(u @ u)
+        v = np.array([dy * u[2] - dz * u[1], dz * u[0] - dx * u[2], dx * u[1] - dy * u[0]])  # d × u
+        miss2 = np.dot(positions, u.astype(np.float32))
+        miss2 -= np.float32(u @ origin)
+        miss2 *= miss2
+        across = np.dot(positions, v.astype(np.float32))
+        across -= np.float32(v @ origin)
+        across *= across
+        miss2 += across  # distancia² de cada centro al rayo
+
+        radii2 = self.radii[:n] * self.radii[:n]
+        hit = miss2 <= radii2
+        hit &= self.alive[:n]
+        candidates = np.flatnonzero(hit)
+        if not len(candidates):
+            return -1
+        # Fase fina solo con las esferas que cruzan la recta: la más cercana delante de la cámara
+        along = (positions[candidates] - origin) @ direction
+        entry = along - np.sqrt(radii2[candidates] - miss2[candidates])
+        entry[along <= 0] = np.inf
+        best = int(np.argmin(entry))
+        return int(candidates[best]) if np.isfinite(entry[best]) else -1
+
+    def hold(self):
+        """Iguala el estado anterior al actual (pausa) para que la interpolación no produzca saltos."""
+        self.previous_positions[:self.count] = self.positions[:self.count]
+        self.previous_angles[:self.count] = self.rotation_angles[:self.count]
+        self.previous_time = self.time
+
+    def interpolate(self, alpha):
+        """Calcula render_positions / render_angles entre el paso anterior (alpha=0) y el actual (alpha=1)."""
+        n = self.count
+        alpha = np.float32(alpha)
+        previous = self.previous_positions[:n]
+        self.render_positions[:n] = previous + (self.positions[:n] - previous) * alpha
+        # El ángulo pudo haber dado la vuelta a 360 en el último paso
+        angles = self.rotation_angles[:n]
+        previous_angles = self.previous_angles[:n]
+        angles = np.where(angles < previous_angles, angles + 360.0, angles)
+        self.render_angles[:n] = previous_angles + (angles - previous_angles) * alpha
+        self.render_time = self.previous_time + (self.time - self.previous_time) * float(alpha)
+
+    def colors(self, index=None):
+        """Devuelve los colores RGB actuales (float32) según la fase de color de cada esfera."""
+        if index is None:
+            index = np.arange(self.count)
+        return cycle_colors(np.minimum(self.color_phases[index], 1.0), self.is_prime[index])
+
+    def instance_data(self):
+        """Datos por instancia para la GPU: (velocidad de rotación, ángulo y fase en time = 0, prima).
+
+        El shader reconstruye ángulo = ángulo0 + velocidad * time y fase = fase0 + COLOR_PHASE_STEP * time.
+        """
+        n = self.count
+        data = np.zeros((n, 4), dtype=np.float32)
+        data[:, 0] = self.rotation_speeds[:n]
+        data[:, 1] = np.mod(self.rotation_angles[:n] - self.rotation_speeds[:n] * self.time, 360.0)
+        data[:, 2] = np.mod(self.color_phases[:n] - COLOR_PHASE_STEP * self.time, COLOR_PHASE_PERIOD)
+        data[:, 3] = self.is_prime[:n]
+        return data
+
+
+def cycle_colors(t, is_prime):
+    """Colores RGB (float32) del ciclo de color para las fases t."""
+    t = np.asarray(t, dtype=np.float32)[:, None]
+    first_half = t < 0.5
+    prime = np.where(first_half,
+                     PRIME_COLOR_START + (PRIME_COLOR_MID - PRIME_COLOR_START) * (t * 2),
+                     PRIME_COLOR_MID + (PRIME_COLOR_END - PRIME_COLOR_MID) * ((t - 0.5) * 2))
+    non_prime = NON_PRIME_COLOR_START + (NON_PRIME_COLOR_END - NON_PRIME_COLOR_START) * t
+    return np.where(np.asarray(is_prime)[:, None], prime, non_prime).astype(np.float32)
+
+
+def gradient_table(samples=256):
+    """Tabla (2, samples, 3) del ciclo de color: fila 0 no primas, fila 1 primas (textura de gradiente)."""
+    t = np.linspace(0.0, 1.0, samples, dtype=np.float32)
+    return np.stack([cycle_colors(t, np.zeros(samples, dtype=bool)),
+                     cycle_colors(t, np.ones(samples, dtype=bool))])
+
+
+class ParticlePool:
+    """Partículas de capacidad fija en arreglos preasignados, con lista libre de ranuras.
+
+    Ni update() ni los datos de dibujo asignan memoria: todo se escribe con out= sobre buffers creados
+    en el constructor. Las ranuras muertas solo vuelven a la lista libre cuando esta se agota.
+    """
+
+    def __init__(self, capacity=2048):
+        self.capacity = capacity
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self.colors = np.zeros((capacity, 3), dtype=np.float32)
+        self.ages = np.zeros(capacity, dtype=np.float32)
+        self.lifespans = np.zeros(capacity, dtype=np.float32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = np.arange(capacity, dtype=np.uint32)[::-1].copy()  # pila de ranuras libres
+        self.free_count = capacity
+        self.live_count = 0
+        self.draw_indices = np.zeros(capacity, dtype=np.uint32)  # ranuras vivas para glDrawElements
+        self._slots = np.arange(capacity, dtype=np.uint32)
+        self._step = np.zeros((capacity, 3), dtype=np.float32)
+        self._mask = np.zeros(capacity, dtype=bool)
+
+    def _reclaim(self):
+        """Reconstruye la lista libre con todas las ranuras muertas."""
+        np.logical_not(self.alive, out=self._mask)
+        self.free_count = int(np.count_nonzero(self._mask))
+        np.compress(self._mask, self._slots, out=self.free[:self.free_count])
+
+    def clear(self):
+        """Apaga todas las partículas y devuelve sus ranuras a la lista libre."""
+        self.alive[:] = False
+        self._reclaim()
+
+    def spawn(self, positions, velocities, color, lifespan):
+        """Activa len(velocities) partículas; si el pool está lleno se descartan las que no caben."""
+        count = len(velocities)
+        if self.free_count < count:
+            self._reclaim()
+            count = min(count, self.free_count)
+        if not count:
+            return
+        slots = self.free[self.free_count - count:self.free_count]
+        self.free_count -= count
+        # positions y color pueden ser uno solo para todas o uno por partícula
+        self.positions[slots] = positions[:count] if np.ndim(positions) == 2 else positions
+        self.velocities[slots] = velocities[:count]
+        self.colors[slots] = color[:count] if np.ndim(color) == 2 else color
+        self.ages[slots] = 0.0
+        self.lifespans[slots] = lifespan
+        self.alive[slots] = True
+
+    def update(self, dt=1.0 / BASE_HZ):
+        """Avanza todas las partículas (velocidad y vida en pasos de 1/60 s) y apaga las que expiran."""
+        scale = np.float32(dt * BASE_HZ)
+        np.multiply(self.velocities, scale, out=self._step)
+        self.positions += self._step
+        self.ages += scale
+        np.less(self.ages, self.lifespans, out=self._mask)
+        self.alive &= self._mask
+
+    def collect(self):
+        """Llena draw_indices con las ranuras vivas y devuelve cuántas son."""
+        self.live_count = int(np.count_nonzero(self.alive))
+        np.compress(self.alive, self._slots, out=self.draw_indices[:self.live_count])
+        return self.live_count
+
+
+class Sphere:
+    """Vista ligera de una esfera guardada en un SphereField (los datos viven en sus arreglos)."""
+
+    def __init__(self, num, radius, position, velocity, is_prime=False, field=None, rng=None):
+        self.field = field if field is not None else SphereField(1)
+        rng = rng if rng is not None else np.random.default_rng()
+        self.index = self.field.add(num, radius, position, velocity, is_prime,
+                                    rotation_speed=rng.uniform(0.5, 2.0))
+        self.flash_state = False
+
+        if self.is_prime:
+            self.color_start = (0.0, 1.0, 0.0)  # Verde
+            self.color_end = (1.0, 1.0, 0.0)  # Amarillo
+
+        else:
+            self.color_start = (1.0, 0.0, 0.0)  # Rojo
+            self.color_end = (0.0, 0.0, 1.0)  # Azu
+
+    @property
+    def num(self):
+        return int(self.field.numbers[self.index])
+
+    @property
+    def is_prime(self):
+        return bool(self.field.is_prime[self.index])
+
+    @property
+    def alive(self):
+        return bool(self.field.alive[self.index])
+
+    @alive.setter
+    def alive(self, value):
+        self.field.alive[self.index] = value
+
+    @property
+    def position(self):
+        return self.field.positions[self.index]
+
+    @position.setter
+    def position(self, value):
+        self.field.positions[self.index] = value
+
+    @property
+    def velocity(self):
+        return self.field.velocities[self.index]
+
+    @velocity.setter
+    def velocity(self, value):
+        self.field.velocities[self.index] = value
+
+    @property
+    def radius(self):
+        return float(self.field.radii[self.index])
+
+    @radius.setter
+    def radius(self, value):
+        self.field.radii[self.index] = value
+
+    @property
+    def rotation_angle(self):
+        return float(self.field.rotation_angles[self.index])
+
+    @property
+    def rotation_speed(self):
+        return float(self.field.rotation_speeds[self.index])
+
+    @property
+    def color_t(self):
+        return float(self.field.color_phases[self.index])
+
+    @property
+    def color(self):
+        return tuple(self.field.colors([self.index])[0].tolist())
+
+    def update_position(self, bounds):
+        """Avanza solo esta esfera (Animation avanza todo el campo de una vez con SphereField.step)."""
+        self.field.step(bounds, [self.index])
+
+    def interpolate_color(self, color_start, color_end, t):
+        """Realiza la interpolación lineal entre dos colores."""
+        return tuple(color_start[i] + (color_end[i] - color_start[i]) * t for i in range(3))
+
+    def set_color(self):
+        """Reinicia el ciclo de color: verde para primos, rojo para no primos."""
+        self.field.color_phases[self.index] = 0.0
+        self.field.version += 1
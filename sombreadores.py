@@ -0,0 +1,328 @@
+#sombreadores.py
+"""Caminos de shaders para las esferas: rotación y color en la GPU y dibujo instanciado."""
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileProgram, compileShader
+from simulacion import COLOR_PHASE_PERIOD, COLOR_PHASE_STEP, gradient_table
+
+INSTANCE_TEXTURE_WIDTH = 1024  # ancho de la textura de datos por instancia (una esfera por texel)
+
+# GLSL 1.20 (perfil de compatibilidad) para convivir con gluSphere y la matriz fija de OpenGL
+SPHERE_VERTEX_SHADER = """
+#version 120
+uniform sampler2D u_instances;
+uniform vec2 u_instances_size;
+uniform float u_instance;
+uniform float u_time;
+uniform float u_phase_step;
+uniform float u_phase_period;
+uniform float u_lift;
+varying float v_phase;
+varying float v_prime;
+varying vec3 v_normal;
+varying vec3 v_view;
+
+// Igual que glRotatef(angle, 1, 1, 0)
+vec3 rotate(vec3 v, float degrees) {
+    vec3 k = vec3(0.70710678, 0.70710678, 0.0);
+    float c = cos(radians(degrees));
+    float s = sin(radians(degrees));
+    return v * c + cross(k, v) * s + k * dot(k, v) * (1.0 - c);
+}
+
+void main() {
+    float row = floor(u_instance / u_instances_size.x);
+    vec2 uv = (vec2(u_instance - row * u_instances_size.x, row) + 0.5) / u_instances_size;
+    vec4 data = texture2DLod(u_instances, uv, 0.0);  // velocidad, ángulo0, fase0, prima
+
+    float angle = mod(data.y + data.x * u_time, 360.0);
+    v_phase = min(mod(data.z + u_phase_step * u_time, u_phase_period), 1.0);
+    v_prime = data.w;
+
+    vec3 position = rotate(gl_Vertex.xyz + vec3(0.0, 0.0, u_lift), angle);
+    vec4 eye = gl_ModelViewMatrix * vec4(position, 1.0);
+    v_normal = gl_NormalMatrix * rotate(gl_Normal, angle);
+    v_view = -eye.xyz;
+    gl_FrontColor = gl_Color;
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+"""
+
+SPHERE_FRAGMENT_SHADER = """
+#version 120
+uniform sampler2D u_gradient;
+uniform int u_mode;
+varying float v_phase;
+varying float v_prime;
+varying vec3 v_normal;
+varying vec3 v_view;
+
+void main() {
+    vec3 base = gl_Color.rgb;
+    if (u_mode == 1) {
+        base = texture2D(u_gradient, vec2(v_phase * (255.0 / 256.0) + 0.5 / 256.0, (v_prime + 0.5) / 2.0)).rgb;
+    }
+    if (u_mode == 2) {
+        gl_FragColor = vec4(base, 1.0);
+        return;
+    }
+    // Misma luz que init_lighting: GL_LIGHT0 direccional con GL_COLOR_MATERIAL en ambiente y difusa,
+    // más el ambiente global del modelo de iluminación (0.2 por defecto)
+    vec3 n = normalize(v_normal);
+    vec3 l = normalize(gl_LightSource[0].position.xyz);
+    float diffuse = max(dot(n, l), 0.0);
+    vec3 color = base * (gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb
+                         + gl_LightSource[0].diffuse.rgb * diffuse);
+    if (diffuse > 0.0) {
+        vec3 h = normalize(l + normalize(v_view));
+        color += gl_FrontMaterial.specular.rgb * gl_LightSource[0].specular.rgb
+                 * pow(max(dot(n, h), 0.0), gl_FrontMaterial.shininess);
+    }
+    gl_FragColor = vec4(color, 1.0);
+}
+"""
+
+
+class SphereShader:
+    """Programa GLSL de las esferas con sus texturas de datos por instancia y de gradiente de color.
+
+    Los datos por instancia (velocidad, ángulo y fase iniciales, prima) se suben solo cuando cambia
+    field.version; por cuadro únicamente se fija el uniform de tiempo.
+    """
+
+    LIT = 0  # color de glColor con iluminación (contorno de las primas)
+    GRADIENT = 1  # color del ciclo tomado de la textura de gradiente
+    UNLIT = 2  # color de glColor sin iluminación (caritas)
+
+    def __init__(self):
+        self.program = compileProgram(compileShader(SPHERE_VERTEX_SHADER, GL_VERTEX_SHADER),
+                                      compileShader(SPHERE_FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+        self.locations = {name: glGetUniformLocation(self.program, name)
+                          for name in ("u_instances", "u_instances_size", "u_instance", "u_time",
+                                       "u_phase_step", "u_phase_period", "u_lift", "u_gradient", "u_mode")}
+        self.uploaded_version = None
+
+        self.gradient_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.gradient_texture)
+        self._set_filtering(GL_LINEAR)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, 256, 2, 0, GL_RGB, GL_FLOAT, gradient_table(256))
+
+        self.instance_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.instance_texture)
+        self._set_filtering(GL_NEAREST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def _set_filtering(self, mode):
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, mode)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, mode)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+
+    def upload(self, field):
+        """Sube los datos por instancia del campo a la textura RGBA32F (una fila cada 1024 esferas)."""
+        data = field.instance_data()
+        rows = max(1, -(-len(data) // INSTANCE_TEXTURE_WIDTH))
+        texels = np.zeros((rows * INSTANCE_TEXTURE_WIDTH, 4), dtype=np.float32)
+        texels[:len(data)] = data
+        glBindTexture(GL_TEXTURE_2D, self.instance_texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA32F, INSTANCE_TEXTURE_WIDTH, rows, 0, GL_RGBA, GL_FLOAT, texels)
+        self.instance_rows = rows
+        self.uploaded_version = field.version
+
+    def begin(self, field):
+        """Activa el programa y fija el tiempo de render del campo."""
+        if self.uploaded_version != field.version:
+            self.upload(field)
+        glUseProgram(self.program)
+        glActiveTexture(GL_TEXTURE1)
+        glBindTexture(GL_TEXTURE_2D, self.gradient_texture)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.instance_texture)
+        glUniform1i(self.locations["u_instances"], 0)
+        glUniform1i(self.locations["u_gradient"], 1)
+        glUniform2f(self.locations["u_instances_size"], INSTANCE_TEXTURE_WIDTH, self.instance_rows)
+        glUniform1f(self.locations["u_time"], field.render_time)
+        glUniform1f(self.locations["u_phase_step"], COLOR_PHASE_STEP)
+        glUniform1f(self.locations["u_phase_period"], COLOR_PHASE_PERIOD)
+        glUniform1f(self.locations["u_lift"], 0.0)
+
+    def set_mode(self, mode):
+        glUniform1i(self.locations["u_mode"], mode)
+
+    def set_instance(self, index, lift=0.0):
+        """Selecciona la esfera index; lift desplaza la geometría en z antes de rotarla (caritas)."""
+        glUniform1f(self.locations["u_instance"], index)
+        if lift:
+            glUniform1f(self.locations["u_lift"], lift)
+
+    def end(self):
+        glUseProgram(0)
+        glActiveTexture(GL_TEXTURE1)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+
+# GLSL 3.30 de compatibilidad: atributos por instancia (glVertexAttribDivisor) y la luz fija de OpenGL
+INSTANCED_VERTEX_SHADER = """
+#version 330 compatibility
+layout(location = 0) in vec3 a_vertex;  // esfera unitaria: posición y normal
+layout(location = 1) in vec4 a_sphere;  // centro xyz, radio
+layout(location = 2) in vec4 a_color;  // rgb, ángulo de rotación en grados
+out vec3 v_color;
+out vec3 v_normal;
+out vec3 v_view;
+
+// Igual que glRotatef(angle, 1, 1, 0)
+vec3 rotate(vec3 v, float degrees) {
+    vec3 k = vec3(0.70710678, 0.70710678, 0.0);
+    float c = cos(radians(degrees));
+    float s = sin(radians(degrees));
+    return v * c + cross(k, v) * s + k * dot(k, v) * (1.0 - c);
+}
+
+void main() {
+    vec3 local = rotate(a_vertex, a_color.w);
+    vec4 eye = gl_ModelViewMatrix * vec4(a_sphere.xyz + local * a_sphere.w, 1.0);
+    v_color = a_color.rgb;
+    v_normal = gl_NormalMatrix * local;
+    v_view = -eye.xyz;
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+"""
+
+INSTANCED_FRAGMENT_SHADER = """
+#version 330 compatibility
+in vec3 v_color;
+in vec3 v_normal;
+in vec3 v_view;
+
+void main() {
+    vec3 n = normalize(v_normal);
+    vec3 l = normalize(gl_LightSource[0].position.xyz);
+    float diffuse = max(dot(n, l), 0.0);
+    vec3 color = v_color * (gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb
+                            + gl_LightSource[0].diffuse.rgb * diffuse);
+    if (diffuse > 0.0) {
+        vec3 h = normalize(l + normalize(v_view));
+        color += gl_FrontMaterial.specular.rgb * gl_LightSource[0].specular.rgb
+                 * pow(max(dot(n, h), 0.0), gl_FrontMaterial.shininess);
+    }
+    gl_FragColor = vec4(color, 1.0);
+}
+"""
+
+OUTLINE_WIDTH = 0.05  # grosor del contorno blanco de las esferas primas
+INSTANCE_FLOATS = 8  # centro xyz, radio, color rgb, ángulo
+
+
+class InstancedSphereRenderer:
+    """Dibuja todas las esferas con mallas fijas en un VBO/IBO y una llamada instanciada por nivel de detalle.
+
+    Todas las mallas (una por nivel de detalle) comparten el mismo VBO e IBO; cada nivel es un rango del IBO.
+    Cada cuadro se sube un único arreglo con los datos por instancia (primero los contornos de las primas,
+    luego los cuerpos, cada grupo ordenado por nivel). Los contornos se dibujan solo con sus caras traseras:
+    con prueba de profundidad, el cuerpo tapa el centro y queda visible únicamente el borde blanco.
+
+    vertex_shader y fragment_shader permiten otro par de shaders con los mismos atributos (el backend core
+    de renderizado los cambia por versiones sin la función fija).
+    """
+
+    def __init__(self, meshes, vertex_shader=INSTANCED_VERTEX_SHADER, fragment_shader=INSTANCED_FRAGMENT_SHADER):
+        if not bool(glDrawElementsInstanced) or not bool(glVertexAttribDivisor):
+            raise RuntimeError("OpenGL 3.3 (dibujo instanciado) no disponible")
+        self.program = compileProgram(compileShader(vertex_shader, GL_VERTEX_SHADER),
+                                      compileShader(fragment_shader, GL_FRAGMENT_SHADER))
+        # Mallas concatenadas: los índices de cada nivel se desplazan al inicio de sus vértices
+        base = np.cumsum([0] + [len(vertices) for vertices, _ in meshes[:-1]])
+        vertices = np.concatenate([vertices for vertices, _ in meshes])
+        indices = np.concatenate([indices + np.uint32(offset) for (_, indices), offset in zip(meshes, base)])
+        self.index_counts = [len(indices) for _, indices in meshes]
+        self.index_offsets = np.cumsum([0] + self.index_counts[:-1]) * 4  # en bytes
+        self.triangles = np.array(self.index_counts) // 3
+        self.instances = np.zeros((64, INSTANCE_FLOATS), dtype=np.float32)
+        self.draw_calls = 0
+
+        self.vao = glGenVertexArrays(1)
+        glBindVertexArray(self.vao)
+        self.vertex_buffer, self.index_buffer, self.instance_buffer = glGenBuffers(3)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vertex_buffer)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.index_buffer)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+        for location in (1, 2):
+            glEnableVertexAttribArray(location)
+            glVertexAttribDivisor(location, 1)
+        self._point_instances(0)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _point_instances(self, first):
+        """Apunta los atributos por instancia del VAO a partir de la instancia first (sin glDraw*BaseInstance)."""
+        stride = INSTANCE_FLOATS * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
+        glVertexAttribPointer(1, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(first * stride))
+        glVertexAttribPointer(2, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(first * stride + 16))
+
+    def fill_instances(self, field, levels):
+        """Escribe en self.instances los contornos y cuerpos de las esferas vivas agrupados por nivel.
+
+        levels tiene el nivel de detalle de cada fila del campo. Devuelve (contornos por nivel, cuerpos por nivel).
+        """
+        n = field.count
+        live = np.flatnonzero(field.alive[:n])
+        live = live[np.argsort(levels[live], kind="stable")]
+        outlines = live[field.is_prime[live]]
+        total = len(outlines) + len(live)
+        if total > len(self.instances):
+            self.instances = np.zeros((2 * total, INSTANCE_FLOATS), dtype=np.float32)
+
+        shells = self.instances[:len(outlines)]
+        shells[:, 0:3] = field.render_positions[outlines]
+        shells[:, 3] = field.radii[outlines] + OUTLINE_WIDTH
+        shells[:, 4:7] = 1.0  # Contorno blanco
+        shells[:, 7] = field.render_angles[outlines]
+
+        bodies = self.instances[len(outlines):total]
+        bodies[:, 0:3] = field.render_positions[live]
+        bodies[:, 3] = field.radii[live]
+        bodies[:, 4:7] = field.colors(live)
+        bodies[:, 7] = field.render_angles[live]
+        minlength = len(self.index_counts)
+        return (np.bincount(levels[outlines], minlength=minlength),
+                np.bincount(levels[live], minlength=minlength))
+
+    def draw(self, field, levels):
+        """Dibuja las esferas vivas con la malla de su nivel; devuelve los triángulos enviados.
+
+        self.program debe estar activo (lo activa la cola de render). Las llamadas de dibujo emitidas
+        quedan en self.draw_calls.
+        """
+        outlines, bodies = self.fill_instances(field, levels)
+        total = int(outlines.sum() + bodies.sum())
+        self.draw_calls = int(np.count_nonzero(outlines) + np.count_nonzero(bodies))
+        if not total:
+            return 0
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
+        glBufferData(GL_ARRAY_BUFFER, total * INSTANCE_FLOATS * 4, self.instances[:total], GL_STREAM_DRAW)
+
+        glBindVertexArray(self.vao)
+        glEnable(GL_CULL_FACE)
+        first = 0
+        for face, counts in ((GL_FRONT, outlines), (GL_BACK, bodies)):  # Contornos: solo la cara trasera
+            glCullFace(face)
+            for level, count in enumerate(counts):
+                if count:
+                    self._point_instances(first)
+                    glDrawElementsInstanced(GL_TRIANGLES, self.index_counts[level], GL_UNSIGNED_INT,
+                                            ctypes.c_void_p(int(self.index_offsets[level])), int(count))
+                    first += int(count)
+        glCullFace(GL_BACK)
+        glDisable(GL_CULL_FACE)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        return int((outlines + bodies) @ self.triangles)
@@ -0,0 +1,154 @@
+#texto.py
+"""Texto en OpenGL con un atlas de glifos: la fuente se rasteriza una sola vez con pygame.font y cada
+cadena se guarda como un lote de quads listo para dibujar."""
+import numpy as np
+import pygame
+from OpenGL.GL import *
+
+ATLAS_CHARACTERS = "".join(chr(code) for code in range(32, 127)) + "¡¿áéíóúÁÉÍÓÚñÑü"
+MAX_CACHED_STRINGS = 256  # cadenas teseladas guardadas antes de vaciar el caché
+
+
+class GlyphAtlas:
+    """Glifos de una fuente TTF empaquetados por filas en una sola imagen RGBA (blancos con alfa).
+
+    font_path None usa la fuente TTF que trae pygame. No usa OpenGL: pixels queda listo para glTexImage2D
+    con la fila superior primero.
+    """
+
+    def __init__(self, font_path=None, size=24, characters=ATLAS_CHARACTERS, width=512):
+        pygame.font.init()
+        font = pygame.font.Font(font_path, size)
+        self.ascent = font.get_ascent()
+        self.line_height = font.get_linesize()
+
+        surfaces = {char: font.render(char, True, (255, 255, 255)) for char in characters}
+        placements = {}
+        x = y = row_height = 0
+        for char, surface in surfaces.items():
+            w, h = surface.get_size()
+            if x + w > width:  # Siguiente fila del atlas
+                x, y, row_height = 0, y + row_height + 1, 0
+            placements[char] = (x, y, w, h)
+            x += w + 1  # Un píxel de separación para que el filtrado no mezcle glifos vecinos
+            row_height = max(row_height, h)
+        height = 1 << (y + row_height - 1).bit_length()
+
+        atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+        atlas.fill((0, 0, 0, 0))
+        for char, surface in surfaces.items():
+            atlas.blit(surface, placements[char][:2], special_flags=pygame.BLEND_RGBA_MAX)
+        self.width, self.height = width, height
+        self.pixels = pygame.image.tobytes(atlas, "RGBA")
+
+        # Por glifo: ancho (también su avance), alto y su rectángulo (u0, v0, u1, v1) en el atlas
+        self.glyphs = {char: (w, h, x / width, y / height, (x + w) / width, (y + h) / height)
+                       for char, (x, y, w, h) in placements.items()}
+        self.strings = {}
+
+    def text_width(self, text):
+        """Ancho en píxeles de text con esta fuente."""
+        return sum(self.glyphs[char][0] for char in text if char in self.glyphs)
+
+    def quads(self, text):
+        """(vértices (4N, 2), coordenadas de textura (4N, 2)) de text con la línea base en y = 0.
+
+        El resultado se guarda por cadena: el HUD repite casi siempre los mismos textos.
+        """
+        cached = self.strings.get(text)
+        if cached is not None:
+            return cached
+        glyphs = [self.glyphs[char] for char in text if char in self.glyphs]
+        vertices = np.empty((len(glyphs), 4, 2), dtype=np.float32)
+        uvs = np.empty((len(glyphs), 4, 2), dtype=np.float32)
+        pen = 0
+        for quad, uv, (w, h, u0, v0, u1, v1) in zip(vertices, uvs, glyphs):
+            top, bottom = self.ascent, self.ascent - h
+            quad[:] = ((pen, bottom), (pen + w, bottom), (pen + w, top), (pen, top))
+            uv[:] = ((u0, v1), (u1, v1), (u1, v0), (u0, v0))
+            pen += w
+        if len(self.strings) >= MAX_CACHED_STRINGS:
+            self.strings.clear()
+        cached = self.strings[text] = (vertices.reshape(-1, 2), uvs.reshape(-1, 2))
+        return cached
+
+
+class BitmapFont:
+    """Atlas de glifos subido una vez como textura; cada llamada a draw dibuja sus quads con glDrawArrays."""
+
+    def __init__(self, atlas=None):
+        self.atlas = atlas if atlas is not None else GlyphAtlas()
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.atlas.width, self.atlas.height, 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, self.atlas.pixels)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def draw(self, vertices, uvs, color=(1.0, 1.0, 1.0)):
+        """Dibuja quads ya teselados (en píxeles de una proyección ortográfica) con una sola llamada."""
+        if not len(vertices):
+            return
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_CURRENT_BIT | GL_TEXTURE_BIT)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self.draw_arrays(vertices, uvs, color)
+        glPopAttrib()
+
+    def draw_arrays(self, vertices, uvs, color=(1.0, 1.0, 1.0)):
+        """Solo la llamada de dibujo: la textura, el blending y la luz ya los fijó quien llama (la cola de
+        render). Devuelve cuántas llamadas de dibujo hizo."""
+        if not len(vertices):
+            return 0
+        glColor3f(*color)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(2, GL_FLOAT, 0, vertices)
+        glTexCoordPointer(2, GL_FLOAT, 0, uvs)
+        glDrawArrays(GL_QUADS, 0, len(vertices))
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        return 1
+
+    def draw_text(self, text, position, color=(1.0, 1.0, 1.0)):
+        """Una cadena con la línea base en position, usando sus quads cacheados."""
+        vertices, uvs = self.atlas.quads(text)
+        glPushMatrix()
+        glTranslatef(position[0], position[1], 0.0)
+        self.draw(vertices, uvs, color)
+        glPopMatrix()
+
+
+class TextBatch:
+    """Varias líneas de texto en un solo arreglo de quads; se vuelve a teselar solo si cambian las líneas."""
+
+    def __init__(self, font):
+        self.font = font
+        self.lines = None
+        self.vertices = np.zeros((0, 2), dtype=np.float32)
+        self.uvs = np.zeros((0, 2), dtype=np.float32)
+
+    def set(self, lines):
+        """lines: secuencia de (texto, (x, y)). Devuelve True si hubo que volver a teselar."""
+        lines = tuple(lines)
+        if lines == self.lines:
+            return False
+        self.lines = lines
+        quads = [self.font.atlas.quads(text) for text, _ in lines]
+        if quads:
+            self.vertices = np.concatenate([vertices + np.asarray(position, dtype=np.float32)
+                                            for (vertices, _), (_, position) in zip(quads, lines)])
+            self.uvs = np.concatenate([uvs for _, uvs in quads])
+        else:  # Sin líneas no debe quedar dibujándose el texto anterior
+            self.vertices = np.zeros((0, 2), dtype=np.float32)
+            self.uvs = np.zeros((0, 2), dtype=np.float32)
+        return True
+
+    def draw(self, color=(1.0, 1.0, 1.0)):
+        self.font.draw(self.vertices, self.uvs, color)